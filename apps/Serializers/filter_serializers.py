@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from apps.models import Property, Image, Amenity
+from apps.mixins import SparseFieldsetMixin
+from apps.models import Property, Image, Amenity, Video, ResidentialComplex, Category, Country, Region, City, \
+    District, Metro, User
 
 
 class ImageSerializer(serializers.ModelSerializer):
@@ -15,10 +17,82 @@ class AmenitySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ImageSerializer(many=True, read_only=True)
     amenities = AmenitySerializer(many=True, read_only=True)
 
     class Meta:
         model = Property
-        fields = '__all__'
+        exclude = ['amenity_mask']
+
+
+class PropertyListSerializer(PropertySerializer):
+    """Compact card representation for list endpoints; other fields are available through ``expand``."""
+    default_fields = ['id', 'name', 'price', 'type', 'label', 'status', 'address', 'area', 'room', 'city',
+                      'created_at', 'images']
+
+
+class PropertyVideoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Video
+        fields = ['id', 'video']
+
+
+class PropertyComplexSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ResidentialComplex
+        fields = ['id', 'name', 'slug', 'description']
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug']
+
+
+class CountrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Country
+        fields = ['id', 'name', 'slug']
+
+
+class RegionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Region
+        fields = ['id', 'name', 'slug']
+
+
+class CitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = City
+        fields = ['id', 'name', 'slug']
+
+
+class DistrictSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = District
+        fields = ['id', 'name', 'slug']
+
+
+class MetroSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Metro
+        fields = ['id', 'name', 'slug']
+
+
+class OwnerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'first_name', 'last_name', 'organization', 'avatar']
+
+
+class PropertyBundleSerializer(PropertySerializer):
+    videos = PropertyVideoSerializer(many=True, read_only=True)
+    residential_complex = PropertyComplexSerializer(read_only=True)
+    category = CategorySerializer(read_only=True)
+    country = CountrySerializer(read_only=True)
+    region = RegionSerializer(read_only=True)
+    city = CitySerializer(read_only=True)
+    district = DistrictSerializer(read_only=True)
+    metro = MetroSerializer(read_only=True)
+    user = OwnerSerializer(read_only=True)
@@ -1,17 +1,21 @@
 from rest_framework import serializers
-from apps.models import Property, Video, Blog, StaticPage
-
-
-class VipPropertySerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Property
-        fields = '__all__'
+from apps.models import Video, Blog, StaticPage, ResidentialComplex
 
 
 class ResidentialComplexSerializer(serializers.ModelSerializer):
+    """A complex with the aggregates of its active units; expects the view's annotations."""
+    units = serializers.IntegerField(read_only=True)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=0, read_only=True)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=0, read_only=True)
+    min_price_per_m2 = serializers.FloatField(read_only=True)
+    max_price_per_m2 = serializers.FloatField(read_only=True)
+    rooms = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    commissioning_date = serializers.DateField(read_only=True)
+
     class Meta:
-        model = Property
-        fields = '__all__'
+        model = ResidentialComplex
+        fields = ['id', 'name', 'slug', 'description', 'units', 'min_price', 'max_price', 'min_price_per_m2',
+                  'max_price_per_m2', 'rooms', 'commissioning_date']
 
 
 class VideoSerializer(serializers.ModelSerializer):
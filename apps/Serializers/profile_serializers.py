@@ -2,6 +2,8 @@ import re
 
 from rest_framework import serializers
 
+from apps.mixins import SparseFieldsetMixin
+from apps.Serializers.filter_serializers import PropertyListSerializer
 from apps.models import User, Message, Property, Tariff, Transaction, Image, Amenity
 
 
@@ -17,13 +19,13 @@ class AmenitySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ImageSerializer(many=True, read_only=True)
     amenities = AmenitySerializer(many=True, read_only=True)
 
     class Meta:
         model = Property
-        fields = '__all__'
+        exclude = ['amenity_mask']
 
 
 class PhoneNumberSerializer(serializers.Serializer):
@@ -90,7 +92,7 @@ class UserMessageSerializer(serializers.ModelSerializer):
 
 
 class UserWishlistSerializer(serializers.Serializer):
-    property = PropertySerializer()
+    property = PropertyListSerializer()
 
 class UserUpdateWishlistSerializer(serializers.Serializer):
     property_id = serializers.IntegerField()
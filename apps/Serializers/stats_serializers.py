@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+
+class PercentilesSerializer(serializers.Serializer):
+    p25 = serializers.FloatField()
+    p50 = serializers.FloatField()
+    p75 = serializers.FloatField()
+
+
+class MarketStatSerializer(serializers.Serializer):
+    """One group of the market stats: a location or category and a listing type."""
+    id = serializers.IntegerField()
+    name = serializers.CharField(allow_null=True)
+    type = serializers.CharField()
+    count = serializers.IntegerField()
+    average_price = serializers.FloatField()
+    price_per_m2 = serializers.FloatField(allow_null=True)
+    price = PercentilesSerializer(allow_null=True)
+    price_per_m2_percentiles = PercentilesSerializer(allow_null=True)
+
+
+class MarketStatsSerializer(serializers.Serializer):
+    dimension = serializers.CharField()
+    room = serializers.IntegerField(allow_null=True)
+    results = MarketStatSerializer(many=True)
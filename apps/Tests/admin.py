@@ -0,0 +1,95 @@
+import pytest
+from django.urls import reverse
+from apps.models import Property, Category, City, Metro, District, Country, Amenity, User, Region
+
+
+@pytest.mark.django_db
+class TestPropertyAdmin:
+    @pytest.fixture
+    def admin_user(self):
+        return User.objects.create_superuser(phone_number="+998900000000", password="adminpass")
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(
+            phone_number="+998901234567", password="testpass123", first_name="Amirsaid", last_name="Samigjanov",
+            balance=100.00
+        )
+
+    @pytest.fixture
+    def property(self, user):
+        category = Category.objects.create(name="Apartment")
+        country = Country.objects.create(name="Uzbekistan")
+        region = Region.objects.create(name="Chilonzor", country=country)
+        city = City.objects.create(name="Tashkent", region=region)
+        metro = Metro.objects.create(name="Chilonzor")
+        district = District.objects.create(name="Yunusabad", city=city)
+
+        amenity = Amenity.objects.create(name="Parking")
+
+        prop = Property.objects.create(
+            name="Modern Apartment in Chilonzor",
+            address="123 Chilonzor Street",
+            building_material="brick",
+            renovation_needed="euro",
+            area=85.50,
+            room=3,
+            floor=5,
+            price=85000,
+            description="A spacious and modern apartment located in the heart of Chilonzor.",
+            type="sale",
+            category=category,
+            label="premium",
+            commissioning_date="2025-05-08",
+            views=120,
+            saves=15,
+            city=city,
+            metro=metro,
+            district=district,
+            country=country,
+            latitude="41.299500",
+            longitude="69.240100",
+            status="active",
+            user=user,
+            region=region,
+        )
+        prop.amenities.set([amenity])
+        return prop
+
+    def test_property_admin_changelist(self, client, admin_user, property, settings, django_assert_max_num_queries):
+        client.force_login(admin_user)
+        samarkand = City.objects.create(name="Samarkand", region=property.region)
+        Property.objects.create(name="Registan view", address="Registan", area=40, room=1, floor=1, price=30000,
+                                type="rent", category=property.category, city=samarkand, region=property.region,
+                                user=property.user)
+        url = reverse('admin:apps_property_changelist')
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert b'name="city"' in response.content and b'Samarkand' not in response.content
+
+        settings.PAGINATION_EXACT_COUNT_LIMIT = 1
+        with django_assert_max_num_queries(12):
+            response = client.get(url, {'city': 'samarkand'})
+        assert [row.name for row in response.context['cl'].result_list] == ["Registan view"]
+        assert response.context['cl'].result_count == 1
+        assert client.get(url, {'city': 'Atlantis'}).context['cl'].result_count == 0
+
+        response = client.get(url, {'q': 'registan'})
+        assert [row.name for row in response.context['cl'].result_list] == ["Registan view"]
+        response = client.get(url, {'q': str(property.pk)})
+        assert [row.pk for row in response.context['cl'].result_list] == [property.pk]
+
+    def test_property_admin_non_ascii_digits(self, client, admin_user, property):
+        client.force_login(admin_user)
+        url = reverse('admin:apps_property_changelist')
+        for params in ({'q': '²'}, {'q': '9' * 30}, {'city': '²'}, {'city': '9' * 30}):
+            response = client.get(url, params)
+            assert response.status_code == 200
+            assert response.context['cl'].result_count == 0
+
+    def test_property_admin_counters_are_readonly(self, client, admin_user, property):
+        client.force_login(admin_user)
+        response = client.get(reverse('admin:apps_property_change', args=[property.pk]))
+        assert response.status_code == 200
+        assert b'name="views"' not in response.content and b'name="saves"' not in response.content
@@ -0,0 +1,14 @@
+import pytest
+
+from apps.counters import save_counter, view_counter
+
+
+@pytest.fixture(autouse=True)
+def discard_counter_hits(monkeypatch):
+    # a request that finds the buffer due would flush it inline and add queries to whichever test it lands in
+    monkeypatch.setattr(view_counter, 'interval', 3600)
+    monkeypatch.setattr(save_counter, 'interval', 3600)
+    yield
+    # primary keys are reused between tests, so buffered hits must not outlive the test that made them
+    view_counter.discard()
+    save_counter.discard()
@@ -1,3 +1,7 @@
+import base64
+import json
+import time
+
 import pytest
 from django.urls import reverse
 from apps.models import (Property, Category, City, Metro, District, Country, Amenity,
@@ -62,4 +66,526 @@ class TestFilterView:
     def test_property_view(self, client, property):
         url = reverse('property', kwargs={'pk': property.id})
         response = client.get(url, content_type='application/json')
-        print(response.data)
\ No newline at end of file
+        print(response.data)
+
+    def test_search_keyset_pagination(self, client, property):
+        for price in (90000, 70000, 85000, 60000):
+            Property.objects.create(
+                name=f"Apartment {price}", address="Chilonzor", building_material="brick",
+                renovation_needed="euro", area=50, room=2, floor=1, price=price, type="sale",
+                category=property.category, city=property.city, region=property.region, user=property.user,
+            )
+        url = reverse('search_property') + '?ordering=lowest_price&page_size=2'
+        prices = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            prices += [int(item['price']) for item in response.data['results']]
+            url = response.data['next']
+        assert prices == [60000, 70000, 85000, 85000, 90000]
+
+        response = client.get(reverse('search_property') + '?ordering=lowest_price&page_size=2')
+        response = client.get(response.data['next'])
+        previous = client.get(response.data['previous'])
+        assert [int(item['price']) for item in previous.data['results']] == [60000, 70000]
+        assert previous.data['previous'] is None
+
+    def test_search_invalid_cursor(self, client, property):
+        response = client.get(reverse('search_property') + '?cursor=garbage')
+        assert response.status_code == 404
+        created = '2025-01-01T00:00:00+00:00'
+        for values in ([created, 'x'], [None, 1], [5, 1], [created, 10 ** 30], [created], [[created], 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'o': 'newest', 'v': values}).encode()).decode()
+            response = client.get(reverse('search_property'), {'cursor': cursor, 'ordering': 'newest'})
+            assert response.status_code == 404, values
+
+    def test_search_query_count_is_constant(self, client, property, django_assert_max_num_queries):
+        amenity = property.amenities.first()
+        for index in range(10):
+            prop = Property.objects.create(
+                name=f"Flat {index}", address="Yunusabad", building_material="brick", renovation_needed="euro",
+                area=40, room=1, floor=2, price=50000 + index, type="rent", category=property.category,
+                city=property.city, region=property.region, user=property.user,
+            )
+            prop.amenities.set([amenity])
+            prop.images.create(image='images/flat.jpg')
+
+        with django_assert_max_num_queries(3):
+            response = client.get(reverse('search_property') + '?page_size=2&count=none')
+        assert len(response.data['results']) == 2
+        with django_assert_max_num_queries(3):
+            response = client.get(reverse('search_property') + '?page_size=11&expand=amenities&count=none')
+        assert len(response.data['results']) == 11
+        assert all(item['amenities'] for item in response.data['results'])
+
+    def test_full_text_search(self, client, property):
+        Property.objects.create(
+            name="Cottage", address="Yunusabad", building_material="brick", renovation_needed="euro",
+            area=140, room=5, floor=1, price=250000, type="sale", description="Ten minutes from Chilonzor metro",
+            category=property.category, city=property.city, region=property.region, user=property.user,
+        )
+        response = client.get(reverse('search_property') + '?q=chilon')
+        assert [item['name'] for item in response.data['results']] == ["Modern Apartment in Chilonzor", "Cottage"]
+
+        response = client.get(reverse('search_property') + '?q=chilonzor metro&type=sale&room=5')
+        assert [item['name'] for item in response.data['results']] == ["Cottage"]
+
+        property.delete()
+        response = client.get(reverse('search_property') + '?q=modern')
+        assert response.data['results'] == []
+
+    def test_rebuild_search_index(self, client, property):
+        from io import StringIO
+        from django.core.management import call_command
+
+        # a queryset update skips the signals that keep the index current
+        Property.objects.filter(pk=property.pk).update(name="Bungalow")
+        assert client.get(reverse('search_property') + '?q=bungalow').data['results'] == []
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = client.get(reverse('search_property') + '?q=bungalow')
+        assert [item['id'] for item in response.data['results']] == [property.id]
+
+    def test_search_facets(self, client, property):
+        Property.objects.create(
+            name="Studio", address="Chilonzor", building_material="monolithic", renovation_needed="euro",
+            area=30, room=1, floor=3, price=30000, type="rent", category=property.category,
+            city=property.city, region=property.region, user=property.user,
+        )
+        response = client.get(reverse('search_property') + '?renovation_needed=euro&facets=type,city,rooms')
+        assert response.status_code == 200
+        assert len(response.data['results']) == 2
+        facets = response.data['facets']
+        assert sorted((item['value'], item['count']) for item in facets['type']) == [('rent', 1), ('sale', 1)]
+        assert facets['city'] == [{'value': property.city_id, 'label': 'Tashkent', 'count': 2}]
+        assert {item['value'] for item in facets['rooms']} == {1, 3}
+
+        response = client.get(reverse('search_property') + '?facets=colour')
+        assert response.status_code == 400
+
+    def test_search_from_column_index(self, client, property, settings):
+        from apps.cache import bump_generation
+        from apps.columnar import column_index
+
+        for index in range(6):
+            Property.objects.create(
+                name=f"Flat {index}", address="Sergeli", building_material="brick", renovation_needed="mid",
+                area=40 + index, room=1 + index % 3, floor=2, price=40000 + 5000 * (index % 4), type="rent",
+                category=property.category, city=property.city, region=property.region, user=property.user,
+            )
+        queries = ['?ordering=lowest_price&page_size=2', '?ordering=popular&room=2', '?min_area=42&max_price=50000',
+                   '?type=rent&renovation_needed=mid&ordering=oldest&page_size=3']
+
+        def collect(query):
+            names, url = [], reverse('search_property') + query
+            while url:
+                response = client.get(url)
+                names += [item['name'] for item in response.data['results']]
+                url = response.data['next']
+            return names
+
+        expected = [collect(query) for query in queries]
+        settings.PROPERTY_COLUMN_INDEX = True
+        column_index.reset()
+        try:
+            assert [collect(query) for query in queries] == expected
+            Property.objects.filter(name="Flat 0").delete()
+            assert "Flat 0" not in collect(queries[0])
+            # a delete made by another process: no signal here, only its shared cache generation bump
+            Property.objects.filter(name="Flat 1")._raw_delete(Property.objects.db)
+            bump_generation(Property)
+            column_index.refresh(force=True)
+            assert column_index.query([], ('id',))[1] == Property.objects.count()
+            assert "Flat 1" not in collect(queries[0])
+        finally:
+            column_index.reset()
+
+    def test_geo_search(self, client, property, settings):
+        for name, lat, lng in (("Near", "41.311100", "69.279700"), ("Samarkand", "39.654200", "66.959700")):
+            Property.objects.create(
+                name=name, address="Center", building_material="brick", renovation_needed="euro", area=60,
+                room=2, floor=4, price=70000, type="sale", latitude=lat, longitude=lng,
+                category=property.category, city=property.city, region=property.region, user=property.user,
+            )
+        url = reverse('search_property')
+        response = client.get(url + '?bbox=41.2,69.1,41.4,69.4')
+        assert {item['name'] for item in response.data['results']} == {"Modern Apartment in Chilonzor", "Near"}
+
+        response = client.get(url + '?lat=41.3111&lng=69.2797&radius=1')
+        assert [item['name'] for item in response.data['results']] == ["Near"]
+
+        response = client.get(url + '?lat=41.3111&lng=69.2797&ordering=nearest&room=2')
+        assert [item['name'] for item in response.data['results']] == ["Near"]
+
+        response = client.get(url + '?lat=39.7&lng=67.0&ordering=nearest&radius=1000&page_size=2')
+        assert [item['name'] for item in response.data['results']] == ["Samarkand", "Modern Apartment in Chilonzor"]
+        response = client.get(response.data['next'])
+        assert [item['name'] for item in response.data['results']] == ["Near"]
+
+        response = client.get(url + '?polygon=41.30,69.27;41.32,69.27;41.32,69.29;41.30,69.29')
+        assert [item['name'] for item in response.data['results']] == ["Near"]
+        settings.POLYGON_MAX_CANDIDATES = 1
+        response = client.get(url + '?polygon=39,66;42,66;42,70;39,70')
+        assert response.status_code == 400
+
+        response = client.get(url + '?bbox=1,2,3')
+        assert response.status_code == 400
+        for query in ('?bbox=nan,69.1,41.4,69.4', '?bbox=41.2,-inf,41.4,inf', '?bbox=-100000,-100000,100000,100000',
+                      '?polygon=41,69;nan,69;42,70', '?polygon=41,69;41,200;42,70', '?lat=91&lng=69&radius=1'):
+            assert client.get(url + query).status_code == 400, query
+
+    def test_location_filters(self, client, property, django_assert_max_num_queries):
+        url = reverse('search_property')
+        for query in (f'?city={property.city_id}', '?city=tashkent', '?city=Tashkent', '?district=yunusabad,tashkent',
+                      '?city=Tash', f'?metro={property.metro.slug}&region={property.region_id}&country=uzbekistan'):
+            response = client.get(url + query)
+            assert [item['id'] for item in response.data['results']] == [property.id], query
+
+        response = client.get(url + '?city=samarkand')
+        assert response.data['results'] == []
+        for value in ('\u00b2', '99999999999999999999999'):
+            response = client.get(url, {'city': value})
+            assert response.status_code == 200 and response.data['results'] == []
+
+        client.get(url + '?city=tashkent')
+        with django_assert_max_num_queries(3):
+            client.get(url + '?city=tashkent')
+
+    def test_index_advisor(self, client, property):
+        from io import StringIO
+        from django.core.management import call_command
+        from datetime import timedelta
+        from unittest import mock
+        from django.db import DatabaseError
+        from apps.middleware import shape_recorder
+        from apps.models import QueryShape
+
+        shape_recorder.buffer.clear()
+        for query in ('?status=active&type=sale&ordering=lowest_price',
+                      '?type=sale&status=active&ordering=lowest_price',
+                      '?label=vip&ordering=nonsense&junk=1'):
+            client.get(reverse('search_property') + query)
+        with mock.patch.object(QueryShape.objects, 'get_or_create', side_effect=DatabaseError):
+            shape_recorder.flush()
+        assert len(shape_recorder.buffer) == 2
+        shape_recorder.flush()
+        shape = QueryShape.objects.get(filters='status,type')
+        assert shape.hits == 2 and shape.ordering == 'lowest_price'
+        assert QueryShape.objects.get(filters='label').ordering == ''
+        stale = shape.last_seen - timedelta(days=1)
+        QueryShape.objects.filter(pk=shape.pk).update(last_seen=stale)
+        client.get(reverse('search_property') + '?status=active&type=sale&ordering=lowest_price')
+        shape_recorder.flush()
+        assert QueryShape.objects.get(pk=shape.pk).last_seen > shape.last_seen
+
+        out = StringIO()
+        call_command('index_advisor', stdout=out)
+        assert "models.Index(fields=['type', 'status', 'price']" in out.getvalue()
+        assert "models.Index(fields=['label', 'created_at']" in out.getvalue()
+
+    def test_amenity_filters(self, client, property):
+        gym, pool = Amenity.objects.create(name="Gym"), Amenity.objects.create(name="Pool")
+        other = Property.objects.create(
+            name="Townhouse", address="Mirzo Ulugbek", building_material="brick", renovation_needed="euro", area=90,
+            room=3, floor=1, price=120000, type="sale", category=property.category, city=property.city,
+            region=property.region, user=property.user,
+        )
+        other.amenities.set([gym, pool])
+        property.amenities.add(gym)
+        property.save()
+        property.refresh_from_db()
+        assert property.amenity_mask == (1 << (gym.id - 1)) | (1 << (property.amenities.get(name="Parking").id - 1))
+
+        url = reverse('search_property')
+        names = lambda response: sorted(item['name'] for item in response.data['results'])
+        assert names(client.get(url + '?amenities=gym,parking')) == ["Modern Apartment in Chilonzor"]
+        assert names(client.get(url + '?amenities=Gym')) == ["Modern Apartment in Chilonzor", "Townhouse"]
+        assert names(client.get(url + '?amenities=gym,sauna')) == []
+        assert names(client.get(url + '?amenities_any=pool,parking')) == ["Modern Apartment in Chilonzor", "Townhouse"]
+
+        pool.properties.clear()
+        assert names(client.get(url + '?amenities_any=pool')) == []
+        gym.delete()
+        assert names(client.get(url + '?amenities=parking')) == ["Modern Apartment in Chilonzor"]
+        assert Property.objects.get(pk=other.pk).amenity_mask == 0
+
+    def test_search_response_cache(self, client, property):
+        url = reverse('search_property') + '?type=sale'
+        first = client.get(url)
+        second = client.get(url)
+        assert first['X-Cache'] == 'MISS' and second['X-Cache'] == 'HIT'
+
+        search = reverse('search_property')
+        sale_last = client.get(search + '?type=rent&type=sale')
+        rent_last = client.get(search + '?type=sale&type=rent')
+        assert rent_last['X-Cache'] == 'MISS'
+        assert [item['id'] for item in sale_last.data['results']] == [property.id]
+        assert rent_last.data['results'] == []
+        assert second.json() == first.json()
+        assert client.get(reverse('search_property') + '?type=sale&cursor=')['X-Cache'] == 'HIT'
+
+        property.price = 1
+        property.save()
+        third = client.get(url)
+        assert third['X-Cache'] == 'MISS'
+        assert third.data['results'][0]['price'] == '1'
+
+    def test_sparse_fieldsets(self, client, property, django_assert_max_num_queries):
+        url = reverse('search_property')
+        card = client.get(url).data['results'][0]
+        assert 'description' not in card and 'amenities' not in card and 'images' in card
+
+        expanded = client.get(url + '?expand=description,amenities').data['results'][0]
+        assert expanded['description'] == property.description
+        assert [item['name'] for item in expanded['amenities']] == ["Parking"]
+
+        with django_assert_max_num_queries(1):
+            response = client.get(url + '?fields=id,name,price&type=sale&count=none')
+        assert list(response.data['results'][0]) == ['id', 'name', 'price']
+
+        assert client.get(url + '?fields=name,secret').status_code == 400
+        detail = client.get(reverse('property', args=[property.id]) + '?fields=name')
+        assert detail.data == {'name': property.name}
+
+    def test_search_count_modes(self, client, property, settings):
+        for index in range(4):
+            Property.objects.create(
+                name=f"Flat {index}", address="Yunusabad", building_material="brick", renovation_needed="euro",
+                area=40, room=1, floor=2, price=50000 + index, type="rent", category=property.category,
+                city=property.city, region=property.region, user=property.user,
+            )
+        url = reverse('search_property') + '?page_size=2'
+        response = client.get(url)
+        assert (response.data['count'], response.data['count_type'], response.data['has_more']) == (5, 'exact', True)
+        response = client.get(url + '&count=none')
+        assert (response.data['count'], response.data['count_type']) == (None, 'none')
+
+        settings.PAGINATION_EXACT_COUNT_LIMIT = 3
+        response = client.get(url + '&type=rent')
+        assert (response.data['count'], response.data['count_type']) == (4, 'cached')
+        response = client.get(url + '&type=rent&count=exact')
+        assert (response.data['count'], response.data['count_type']) == (4, 'exact')
+        response = client.get(url + '&type=sale')
+        assert (response.data['count'], response.data['count_type'], response.data['has_more']) == (1, 'exact', False)
+
+    def test_property_view_counter(self, client, property):
+        from apps.counters import view_counter
+
+        url = reverse('property', args=[property.id])
+        for _ in range(3):
+            client.get(url)
+        assert Property.objects.get(pk=property.pk).views == 120
+        view_counter.flush()
+        assert Property.objects.get(pk=property.pk).views == 123
+
+        property.name = "Renamed"
+        property.save()
+        assert Property.objects.get(pk=property.pk).views == 123
+
+    @pytest.mark.django_db(transaction=True)
+    def test_property_view_counter_idle_flush(self, client, property, monkeypatch):
+        from apps.counters import view_counter
+
+        # a hit that does not find the buffer due is still written once hits stop coming
+        monkeypatch.setattr(view_counter, 'interval', 0.2)
+        monkeypatch.setattr(view_counter, 'flushed_at', time.monotonic())
+        client.get(reverse('property', args=[property.id]))
+        assert Property.objects.get(pk=property.pk).views == 120
+        deadline = time.monotonic() + 5
+        while Property.objects.get(pk=property.pk).views == 120 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert Property.objects.get(pk=property.pk).views == 121
+
+    def test_property_conditional_get(self, client, property, django_assert_max_num_queries):
+        from apps.cache import get_cache
+
+        url = reverse('property', args=[property.id])
+        first = client.get(url)
+        etag, last_modified = first['ETag'], first['Last-Modified']
+        with django_assert_max_num_queries(1):
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+        with django_assert_max_num_queries(1):
+            cached = client.get(url)
+        assert cached.status_code == 200 and cached['ETag'] == etag and cached.json() == first.json()
+        assert client.get(url + '?fields=name', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+        get_cache().clear()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        Property.objects.filter(pk=property.pk).update(views=500)
+        counted = client.get(url)
+        assert counted['ETag'] == etag and counted.json()['views'] == 500
+
+        property.images.create(image='images/new.jpg')
+        changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert changed.status_code == 200 and changed['ETag'] != etag
+        assert changed.data['images'][-1]['image'].endswith('images/new.jpg')
+        amenity = property.amenities.first()
+        amenity.name = "Underground parking"
+        amenity.save()
+        renamed = client.get(url, HTTP_IF_NONE_MATCH=changed['ETag'])
+        assert renamed.status_code == 200 and renamed.data['amenities'][0]['name'] == "Underground parking"
+        assert client.get(reverse('property', args=[0])).status_code == 404
+
+    def test_similar_properties(self, client, property, settings):
+        from apps.similarity import similarity_index
+
+        settings.PROPERTY_SIMILARITY_INDEX = True
+        similarity_index.reset()
+        other_city = City.objects.create(name="Samarkand", region=property.region)
+        common = dict(building_material="brick", renovation_needed="euro", floor=4, category=property.category,
+                      region=property.region, user=property.user, address="Tashkent")
+        twin = Property.objects.create(name="Twin", area=80, room=3, price=82000, type="sale", city=property.city,
+                                       latitude="41.300000", longitude="69.250000", **common)
+        Property.objects.create(name="Mansion", area=400, room=8, price=900000, type="sale", city=property.city,
+                                **common)
+        Property.objects.create(name="Far away", area=85, room=3, price=85000, type="sale", city=other_city,
+                                **common)
+        Property.objects.create(name="Rental", area=85, room=3, price=850, type="rent", city=property.city, **common)
+        Property.objects.create(name="Sold", area=85, room=3, price=85000, type="sale", city=property.city,
+                                status="inactive", **common)
+
+        url = reverse('similar_property', args=[property.id])
+        names = [item['name'] for item in client.get(url + '?limit=3').data]
+        assert names == ["Twin", "Far away", "Mansion"]
+        assert [item['name'] for item in client.get(url + '?limit=1').data] == ["Twin"]
+
+        twin.status = "inactive"
+        twin.save()
+        similarity_index.refresh(force=True)
+        assert [item['name'] for item in client.get(url + '?limit=1').data] == ["Mansion"]
+
+        settings.PROPERTY_SIMILARITY_INDEX = False
+        assert [item['name'] for item in client.get(url).data] == ["Mansion"]
+        assert client.get(reverse('similar_property', args=[0])).status_code == 404
+
+    def test_property_bundle(self, client, property, django_assert_max_num_queries):
+        parent = Category.objects.create(name="Residential")
+        property.category.parent = parent
+        property.category.save()
+        property.videos.create(video="https://example.com/tour.mp4")
+        property.images.create(image='images/room.jpg')
+
+        url = reverse('property_bundle', args=[property.id])
+        with django_assert_max_num_queries(7):
+            response = client.get(url)
+        data = response.data
+        assert data['city']['name'] == "Tashkent" and data['district']['name'] == "Yunusabad"
+        assert data['user'] == {'id': property.user.id, 'first_name': "Amirsaid", 'last_name': "Samigjanov",
+                                'organization': "", 'avatar': None}
+        assert [item['name'] for item in data['category_path']] == ["Residential", "Apartment"]
+        assert [item['video'] for item in data['videos']] == ["https://example.com/tour.mp4"]
+        assert len(data['images']) == 1 and data['amenities'][0]['name'] == "Parking"
+        assert data['residential_complex'] is None
+
+        with django_assert_max_num_queries(1):
+            assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+        property.city.name = "Toshkent"
+        property.city.save()
+        renamed = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert renamed.status_code == 200 and renamed.data['city']['name'] == "Toshkent"
+
+        videos = client.get(reverse('property_videos', args=[property.id]))
+        assert [item['video'] for item in videos.data] == ["https://example.com/tour.mp4"]
+        assert client.get(reverse('property_videos', args=[0])).status_code == 404
+
+    def test_property_bulk(self, client, property, django_assert_max_num_queries):
+        common = dict(address="Yunusabad", building_material="brick", renovation_needed="euro", area=40, room=1,
+                      floor=2, price=50000, type="rent", category=property.category, city=property.city,
+                      region=property.region, user=property.user)
+        first = Property.objects.create(name="First", **common)
+        hidden = Property.objects.create(name="Hidden", status="moderation", **common)
+
+        url = reverse('property_bulk')
+        with django_assert_max_num_queries(2):
+            response = client.get(url + f'?ids={first.id},999,{property.id},{hidden.id},{first.id}')
+        assert [item['name'] for item in response.data['results']] == ["First", property.name]
+        assert response.data['missing'] == [999] and response.data['inactive'] == [hidden.id]
+
+        response = client.get(url + f'?ids={property.id},{hidden.id}&fields=id,price')
+        assert response.data['results'] == [{'id': property.id, 'price': '85000'}]
+        assert response.data['inactive'] == [hidden.id]
+        assert client.get(url + '?ids=1,x').status_code == 400
+        assert client.get(url, {'ids': '\u00b2'}).status_code == 400
+        assert client.get(url, {'ids': '99999999999999999999999'}).status_code == 400
+        assert client.get(url).status_code == 400
+
+    def test_market_stats(self, client, property, settings, monkeypatch):
+        from io import StringIO
+        from django.core.management import call_command
+        from apps import market
+        from apps.models import MarketStat
+        from apps.similarity import similarity_index
+
+        settings.PROPERTY_SIMILARITY_INDEX = True
+        similarity_index.reset()
+        common = dict(address="Yunusabad", building_material="brick", renovation_needed="euro", floor=2,
+                      type="sale", category=property.category, city=property.city, district=property.district,
+                      region=property.region, user=property.user)
+        small = Property.objects.create(name="Small", area=40, room=1, price=40000, **common)
+        Property.objects.create(name="Medium", area=60, room=2, price=66000, **common)
+        url = reverse('market_stats') + f'?dimension=district&ids={property.district_id}'
+
+        def district_stats():
+            [row] = client.get(url).data['results']
+            return row
+
+        row = district_stats()
+        assert (row['name'], row['count'], row['average_price']) == ("Yunusabad", 3, 63666.67)
+        assert row['price_per_m2'] == round(191000 / 185.5, 2)
+        assert row['price'] == {'p25': 53000.0, 'p50': 66000.0, 'p75': 75500.0}
+
+        small.price = 46000
+        small.save()
+        assert district_stats()['average_price'] == 65666.67
+        small.status = "inactive"
+        small.save()
+        assert district_stats()['count'] == 2
+        property.delete()
+        row = district_stats()
+        assert (row['count'], row['average_price']) == (1, 66000.0)
+
+        before = sorted(MarketStat.objects.filter(count__gt=0).values_list('dimension', 'key', 'room', 'count'))
+        call_command('rebuild_market_stats', stdout=StringIO())
+        assert sorted(MarketStat.objects.values_list('dimension', 'key', 'room', 'count')) == before
+
+        settings.PROPERTY_SIMILARITY_INDEX = False
+        assert district_stats()['price'] == {'p25': 66000.0, 'p50': 66000.0, 'p75': 66000.0}
+        for price, area in ((300, 30), (450, 0), (500, 50)):
+            Property.objects.create(name="Rent", area=area, room=1, price=price, **{**common, 'type': 'rent'})
+        vectorized = market.percentiles(MarketStat.Dimension.DISTRICT)
+        assert vectorized[property.district_id, 'rent']['price'] == [375.0, 450.0, 475.0]
+        monkeypatch.setattr(market, 'np', None)
+        assert market.percentiles(MarketStat.Dimension.DISTRICT) == vectorized
+        monkeypatch.undo()
+        assert client.get(reverse('market_stats') + '?dimension=planet').status_code == 400
+
+        first, second = client.get(url + '&type=sale'), client.get(url + '&type=sale')
+        assert first['X-Cache'] == 'MISS' and second['X-Cache'] == 'HIT'
+        for ids in ('99999999999999999999999', '\u00b2'):
+            assert client.get(reverse('market_stats'), {'dimension': 'city', 'ids': ids}).status_code == 400
+        assert client.get(reverse('market_stats'), {'dimension': 'city', 'room': '1' * 30}).status_code == 400
+
+    def test_search_histograms(self, client, property, settings, django_assert_max_num_queries):
+        common = dict(address="Yunusabad", building_material="brick", renovation_needed="euro", floor=2,
+                      category=property.category, city=property.city, region=property.region, user=property.user)
+        Property.objects.create(name="Cheap", area=20, room=1, price=5000, type="rent", **common)
+        Property.objects.create(name="Mid", area=50, room=2, price=45000, type="sale", **common)
+        url = reverse('search_property') + '?count=none&histogram=price,area'
+
+        histograms = client.get(url).data['histograms']
+        price = histograms['price']
+        assert len(price['edges']) == 21 and price['edges'][0] == 5000.0 and price['edges'][-1] == 85000.0
+        assert price['counts'][0] == 1 and price['counts'][10] == 1 and price['counts'][-1] == 1
+        assert sum(histograms['area']['counts']) == 3
+
+        with django_assert_max_num_queries(3):
+            response = client.get(url.replace('price,area', 'price') + '&type=sale')
+        by_type = response.data['histograms']['price']['counts']
+        assert sum(by_type) == 2 and by_type[0] == 0
+        assert sum(client.get(url + '&type=rent').data['histograms']['price']['counts']) == 1
+
+        counts = client.get(url + '&type=sale&min_area=60').data['histograms']['price']['counts']
+        assert counts[-1] == 1 and sum(counts) == 1
+        settings.PROPERTY_COLUMN_INDEX = True
+        assert client.get(url + '&type=sale&min_area=60&room=3').data['histograms']['price']['counts'] == counts
+        assert client.get(url + '&histogram=rooms').status_code == 400
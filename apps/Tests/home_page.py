@@ -2,7 +2,8 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 from apps.models import (Property, Category, City, Metro, District, Country, Amenity,
-                         User, Region)
+                         User, Region, Tariff, ResidentialComplex, Blog, StaticPage)
+from apps.vip import vip_feed
 
 @pytest.mark.django_db
 class TestHomePageView:
@@ -59,11 +60,88 @@ class TestHomePageView:
         assert response.status_code == status.HTTP_200_OK
         print(response.data)
 
+    def test_vip_feed(self, client, property, user):
+        def listing(name, label, status="active"):
+            return Property.objects.create(
+                name=name, address="Street", area=50, room=2, floor=1, price=50000, type="sale", label=label,
+                category=property.category, city=property.city, region=property.region, status=status,
+                latitude="41.3", longitude="69.2", user=user, commissioning_date="2025-05-08",
+            )
+
+        premium = listing("Premium", "premium")
+        listing("Hidden", "vip", status="inactive")
+        listing("Urgent", "urgent")
+        Tariff.objects.create(name="Gold", price=100000, duration_days=30, user=user)
+
+        url = reverse('vip_property')
+        response = client.get(url, {'limit': 1})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        response = client.get(url)
+        assert {row['name'] for row in response.data} == {property.name, "Premium"}
+        assert vip_feed.get()[1] == [100000.0, 100000.0]
+
+        premium.status = "inactive"
+        premium.save()
+        response = client.get(url)
+        assert [row['name'] for row in response.data] == [property.name]
+
     def test_residential_complex(self, client, property):
         url = reverse('residential_complex')
         response = client.get(url, content_type='application/json')
         assert response.status_code == status.HTTP_200_OK
 
+    def test_residential_complex_aggregates(self, client, property, django_assert_max_num_queries):
+        towers = ResidentialComplex.objects.create(name="Towers")
+        ResidentialComplex.objects.create(name="Empty")
+        property.residential_complex = towers
+        property.save()
+        for room, price, area, state in ((1, 40000, 40, "active"), (3, 90000, 100, "active"),
+                                         (5, 10, 10, "inactive")):
+            Property.objects.create(
+                name=f"Unit {room}", address="Street", area=area, room=room, floor=1, price=price, type="sale",
+                category=property.category, city=property.city, region=property.region, status=state,
+                latitude="41.3", longitude="69.2", residential_complex=towers, commissioning_date="2024-01-01",
+                user=property.user,
+            )
+
+        url = reverse('residential_complex')
+        with django_assert_max_num_queries(3):
+            response = client.get(url, {'count': 'none'})
+        assert response.status_code == status.HTTP_200_OK
+        [row] = response.data['results']
+        assert row['name'] == "Towers"
+        assert row['units'] == 3
+        assert (row['min_price'], row['max_price']) == ("40000", "90000")
+        assert (row['min_price_per_m2'], row['max_price_per_m2']) == (900.0, 1000.0)
+        assert row['rooms'] == [1, 3]
+        assert row['commissioning_date'] == "2024-01-01"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_home_view(self, client, property):
+        Blog.objects.create(title="First")
+        Blog.objects.create(title="Second")
+        StaticPage.objects.create(title="About", content="About us")
+        StaticPage.objects.create(title="Contacts", content="Contact us")
+
+        url = reverse('home')
+        response = client.get(url, {'blogs_limit': 1})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert set(data) == {'vip', 'residential_complexes', 'videos', 'blogs', 'static_pages'}
+        assert [row['name'] for row in data['vip']] == [property.name]
+        assert [row['title'] for row in data['blogs']] == ["Second"]
+        assert [row['title'] for row in data['static_pages']] == ["Contacts", "About"]
+        assert data['residential_complexes'] == data['videos'] == []
+
+        # a queryset update sends no signal, so the cached section is served as it was
+        Blog.objects.filter(title="Second").update(title="Renamed")
+        again = client.get(url, {'blogs_limit': 1}).json()
+        assert again['blogs'] == data['blogs'] and again['static_pages'] == data['static_pages']
+
+        Blog.objects.create(title="Third")
+        assert [row['title'] for row in client.get(url, {'blogs_limit': 1}).json()['blogs']] == ["Third"]
+
     def test_videos_view(self, client):
         url = reverse('videos')
         response = client.get(url, content_type='application/json')
@@ -74,7 +152,47 @@ class TestHomePageView:
         response = client.get(url, content_type='application/json')
         assert response.status_code == status.HTTP_200_OK
 
+    def test_prerendered_blogs(self, client, django_assert_num_queries, django_capture_on_commit_callbacks):
+        import gzip
+        import json
+
+        Blog.objects.create(title="First", description="Hello", image="blogs/first.jpg")
+        url = reverse('blogs')
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate;q=0.5')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        data = json.loads(gzip.decompress(response.content))
+        assert data['count'] == 1 and data['has_more'] is False and data['next'] is None
+        assert [row['title'] for row in data['results']] == ["First"]
+        assert data['results'][0]['image'] == 'http://testserver/media/blogs/first.jpg'
+        assert client.get(url, {'page_size': 1}).json() == data
+        etag = response['ETag']
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        plain = client.get(url)
+        assert 'Content-Encoding' not in plain and plain['ETag'] != etag
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Blog.objects.create(title="Second", slug="second-post")
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        data = json.loads(gzip.decompress(response.content))
+        assert [row['title'] for row in data['results']] == ["Second", "First"]
+        assert data['results'][1]['image'] == 'http://testserver/media/blogs/first.jpg'
+        with django_assert_num_queries(0):
+            detail = client.get(reverse('blog_detail', args=["second-post"]))
+        assert json.loads(detail.content)['title'] == "Second"
+        assert client.get(reverse('blog_detail', args=["missing"])).status_code == status.HTTP_404_NOT_FOUND
+
     def test_static_pages_view(self, client):
         url = reverse('static_pages')
         response = client.get(url, content_type='application/json')
         assert response.status_code == status.HTTP_200_OK
+        assert response.json()['results'] == []
+        page = StaticPage.objects.create(title="About us", content="Text")
+        response = client.get(reverse('static_page_detail', args=[page.slug]))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['content'] == "Text"
@@ -1,3 +1,4 @@
+from io import StringIO
 import pytest
 from django.urls import reverse
 from rest_framework import status
@@ -178,4 +179,23 @@ class TestUserProfileView:
         url = reverse('user_property_delete', kwargs={'pk': property.id})
         response = auth_client.delete(url, content_type='application/json')
         assert response.status_code == status.HTTP_200_OK
-        print(response.data)
\ No newline at end of file
+        print(response.data)
+
+    def test_wishlist_saves_counter(self, auth_client, property, django_capture_on_commit_callbacks):
+        from apps.counters import save_counter
+        from django.core.management import call_command
+
+        url = reverse('user_wishlist_update', kwargs={'pk': property.id})
+        with django_capture_on_commit_callbacks(execute=True):
+            assert auth_client.patch(url, content_type='application/json').status_code == status.HTTP_201_CREATED
+        save_counter.flush()
+        assert Property.objects.get(pk=property.pk).saves == property.saves + 1
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.patch(url, content_type='application/json')
+            auth_client.patch(url, content_type='application/json')
+        save_counter.flush()
+        assert Property.objects.get(pk=property.pk).saves == property.saves + 1
+
+        Property.objects.filter(pk=property.pk).update(saves=7)
+        call_command('reconcile_saves', '--chunk-size', '1', stdout=StringIO())
+        assert Property.objects.get(pk=property.pk).saves == 1
@@ -1,4 +1,6 @@
 from .profile_views import *
 from .home_page_views import *
 from .filter_views import *
-from .auth import *
\ No newline at end of file
+from .auth import *
+from .cache_views import *
+from .stats_views import *
@@ -0,0 +1,19 @@
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import serializers
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.cache import metrics
+
+
+@extend_schema(tags=["Cache"], responses=inline_serializer('ResponseCacheStats', {
+    'hits': serializers.IntegerField(),
+    'misses': serializers.IntegerField(),
+    'hit_ratio': serializers.FloatField(allow_null=True),
+}))
+class ResponseCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(metrics())
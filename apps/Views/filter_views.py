@@ -1,18 +1,38 @@
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
-from rest_framework.generics import ListAPIView, RetrieveAPIView
-from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.generics import ListAPIView, RetrieveAPIView, get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 
-from apps.Serializers.filter_serializers import PropertySerializer
+from apps.Serializers.filter_serializers import PropertySerializer, PropertyListSerializer, PropertyBundleSerializer, \
+    PropertyVideoSerializer
+from apps.counters import view_counter
+from apps.facets import FACETS, facet_counts, parse_facets
 from apps.filters import SearchPropertyFilter
-from apps.models import Property
+from apps.histograms import HISTOGRAM_FIELDS, histogram_counts, parse_histograms
+from apps.locations import location_resolver, parse_id
+from apps.mixins import CachedResponseMixin, ColumnIndexMixin, ConditionalDetailMixin, SerializerPrefetchMixin
+from apps.models import Property, Image, Amenity, Category, ResidentialComplex, Country, Region, City, District, \
+    Metro, Video
+from apps.pagination import PROPERTY_ORDERINGS, parse_limit
+from apps.search import RANK_ANNOTATION
+from apps.similarity import similar_property_ids
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(name="fields", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                     description="Comma-separated fields to return instead of the default set"),
+    OpenApiParameter(name="expand", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                     description="Comma-separated fields to add to the default set, e.g. description,amenities"),
+]
 
 
 @extend_schema(
     tags=["Search"],
     parameters=[
+        OpenApiParameter(name="q", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                         description="Full-text search over name, address and description, ranked by relevance"),
         OpenApiParameter(name="search", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
                          description="Search by address (case-insensitive)"),
         OpenApiParameter(name="name", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
@@ -62,17 +82,31 @@ from apps.models import Property
         OpenApiParameter(name="residential_name", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
                          description="Residential complex name (case-insensitive)"),
         OpenApiParameter(name="city", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
-                         description="City name (case-insensitive)"),
+                         description="City ids, slugs or names, comma-separated"),
         OpenApiParameter(name="region", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
-                         description="Region name (case-insensitive)"),
+                         description="Region ids, slugs or names, comma-separated"),
         OpenApiParameter(name="metro", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
-                         description="Metro station name (case-insensitive)"),
+                         description="Metro station ids, slugs or names, comma-separated"),
         OpenApiParameter(name="district", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
-                         description="District name (case-insensitive)"),
+                         description="District ids, slugs or names, comma-separated"),
         OpenApiParameter(name="country", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
-                         description="Country name (case-insensitive)"),
+                         description="Country ids, slugs or names, comma-separated"),
         OpenApiParameter(name="amenities", type={"type": "array", "items": {"type": "string"}},
-                         location=OpenApiParameter.QUERY, description="List of amenity names (e.g., ['pool', 'gym'])"),
+                         location=OpenApiParameter.QUERY,
+                         description="Amenity names or ids the property must all have (e.g., ['pool', 'gym'])"),
+        OpenApiParameter(name="amenities_any", type={"type": "array", "items": {"type": "string"}},
+                         location=OpenApiParameter.QUERY,
+                         description="Amenity names or ids the property must have at least one of"),
+        OpenApiParameter(name="bbox", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                         description="Map viewport as south,west,north,east"),
+        OpenApiParameter(name="polygon", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                         description="Polygon as lat,lng points separated by ';'"),
+        OpenApiParameter(name="lat", type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY,
+                         description="Center latitude for radius search and nearest ordering"),
+        OpenApiParameter(name="lng", type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY,
+                         description="Center longitude for radius search and nearest ordering"),
+        OpenApiParameter(name="radius", type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY,
+                         description="Radius around lat/lng in km (nearest ordering defaults to 50 km)"),
         OpenApiParameter(name="commissioning_date", type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY,
                          description="Exact commissioning date"),
         OpenApiParameter(name="min_commissioning_date", type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY,
@@ -87,49 +121,185 @@ from apps.models import Property
                          description="Updated after date"),
         OpenApiParameter(name="updated_before", type=OpenApiTypes.DATETIME, location=OpenApiParameter.QUERY,
                          description="Updated before date"),
+        *FIELDSET_PARAMETERS,
+        OpenApiParameter(name="facets", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                         description="Comma-separated facets to count for the current filters: " + ", ".join(FACETS)),
+        OpenApiParameter(name="histogram", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                         description="Comma-separated fields to bucket for the current filters: " +
+                                     ", ".join(HISTOGRAM_FIELDS)),
         OpenApiParameter(
             name="ordering",
             type=OpenApiTypes.STR,
             location=OpenApiParameter.QUERY,
-            description="Sort results by: highest_price, lowest_price, less_viewed, popular, newest, oldest",
-            enum=["highest_price", "lowest_price", "less_viewed", "popular", "newest", "oldest"],
+            description="Sort results by: highest_price, lowest_price, less_viewed, popular, newest, oldest, "
+                        "relevance (with q; the default when q is given), nearest (with lat and lng)",
+            enum=["highest_price", "lowest_price", "less_viewed", "popular", "newest", "oldest", "relevance",
+                  "nearest"],
         ),
     ],
 )
-class SearchProperty(ListAPIView):
-    serializer_class = PropertySerializer
+class SearchProperty(CachedResponseMixin, ColumnIndexMixin, SerializerPrefetchMixin, ListAPIView):
+    serializer_class = PropertyListSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filter_backends = [DjangoFilterBackend]
     filterset_class = SearchPropertyFilter
-    ordering_fields = ['price', 'views', 'created_at']
-    ordering = ['-created_at']
+    cache_models = (Property, Image, Amenity, Category, ResidentialComplex, Country, Region, City, District, Metro)
+    cursor_orderings = {**PROPERTY_ORDERINGS, 'relevance': (RANK_ANNOTATION, 'id'), 'nearest': ('distance', 'id')}
+
+    @property
+    def cursor_default_ordering(self):
+        return 'relevance' if self.request.query_params.get('q') else 'newest'
 
     def get_queryset(self):
-        queryset = Property.objects.all()
-        ordering = self.request.query_params.get('ordering', None)
-        if ordering:
-            if ordering == 'highest_price':
-                queryset = queryset.order_by('-price')
-            elif ordering == 'lowest_price':
-                queryset = queryset.order_by('price')
-            elif ordering == 'less_viewed':
-                queryset = queryset.order_by('views')
-            elif ordering == 'popular':
-                queryset = queryset.order_by('-views')
-            elif ordering == 'newest':
-                queryset = queryset.order_by('-created_at')
-            elif ordering == 'oldest':
-                queryset = queryset.order_by('created_at')
-        return queryset
+        return Property.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        facets = parse_facets(request.query_params.get('facets', ''))
+        histograms = parse_histograms(request.query_params.get('histogram', ''))
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if facets:
+            response.data['facets'] = facet_counts(queryset, facets)
+        if histograms:
+            filterset = self.filterset_class(request.query_params, queryset=self.get_queryset(), request=request)
+            response.data['histograms'] = histogram_counts(queryset, filterset, histograms)
+        return response
 
 
 @extend_schema(
     tags=["Property"],
+    parameters=FIELDSET_PARAMETERS,
 )
-class PropertyView(RetrieveAPIView):
+class PropertyView(ConditionalDetailMixin, SerializerPrefetchMixin, RetrieveAPIView):
     serializer_class = PropertySerializer
     permission_classes = [AllowAny]
+    queryset = Property.objects.all()
     lookup_field = 'id'
+    lookup_url_kwarg = 'pk'
+    volatile_fields = ('views', 'saves')
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            view_counter.increment(kwargs['pk'])
+        return response
+
+
+@extend_schema(
+    tags=["Property"],
+    parameters=[
+        OpenApiParameter(name="limit", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                         description="Number of similar properties to return (default 10, at most 50)"),
+        *FIELDSET_PARAMETERS,
+    ],
+)
+class SimilarPropertyView(SerializerPrefetchMixin, ListAPIView):
+    serializer_class = PropertyListSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+    default_limit = 10
+    max_limit = 50
+
+    def get_queryset(self):
+        return Property.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        property_obj = get_object_or_404(Property.objects.only('id', 'type', 'city_id', 'category_id', 'price'),
+                                         pk=kwargs['pk'])
+        limit = parse_limit(request.query_params.get('limit'), self.default_limit, self.max_limit)
+        ids = similar_property_ids(property_obj, limit)
+        rows = {row.pk: row for row in self.filter_queryset(self.get_queryset()).filter(pk__in=ids)}
+        serializer = self.get_serializer([rows[pk] for pk in ids if pk in rows], many=True)
+        return Response(serializer.data)
+
+
+@extend_schema(
+    tags=["Property"],
+    parameters=FIELDSET_PARAMETERS,
+)
+class PropertyBundleView(ConditionalDetailMixin, SerializerPrefetchMixin, RetrieveAPIView):
+    """Everything the property page renders, in one response: media, amenities, complex, locations and owner."""
+    serializer_class = PropertyBundleSerializer
+    permission_classes = [AllowAny]
+    queryset = Property.objects.all()
+    lookup_field = 'id'
+    lookup_url_kwarg = 'pk'
+    volatile_fields = ('views', 'saves')
+    cache_models = (Category, ResidentialComplex, Country, Region, City, District, Metro)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if 'category' in response.data:
+            response.data['category_path'] = location_resolver.ancestry(Category, response.data['category']['id'])
+        return response
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            view_counter.increment(kwargs['pk'])
+        return response
+
+
+@extend_schema(tags=["Property"])
+class PropertyVideoView(ListAPIView):
+    serializer_class = PropertyVideoSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+
+    def get_queryset(self):
+        get_object_or_404(Property.objects.only('id'), pk=self.kwargs['pk'])
+        return Video.objects.filter(property_id=self.kwargs['pk']).order_by('id')
+
+
+@extend_schema(
+    tags=["Property"],
+    parameters=[
+        OpenApiParameter(name="ids", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=True,
+                         description="Comma-separated property ids, at most 500; results keep this order"),
+        *FIELDSET_PARAMETERS,
+    ],
+)
+class PropertyBulkView(CachedResponseMixin, SerializerPrefetchMixin, ListAPIView):
+    """Active properties for an id list, plus the ids that do not exist or are not active."""
+    serializer_class = PropertyListSerializer
+    permission_classes = [AllowAny]
+    filter_backends = []
+    pagination_class = None
+    cache_models = (Property, Image, Amenity)
+    max_ids = 500
+
+    def get_ids(self):
+        ids = []
+        for part in self.request.query_params.get('ids', '').split(','):
+            part = part.strip()
+            if not part:
+                continue
+            pk = parse_id(part)
+            if pk is None:
+                raise ValidationError({'ids': f"Invalid id: {part}"})
+            ids.append(pk)
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValidationError({'ids': "This parameter is required."})
+        if len(ids) > self.max_ids:
+            raise ValidationError({'ids': f"At most {self.max_ids} ids are allowed."})
+        return ids
+
+    def get_queryset(self):
+        return Property.objects.all()
 
-    def get_object(self):
-        return Property.objects.get(id=self.kwargs['pk'])
+    def list(self, request, *args, **kwargs):
+        ids = self.get_ids()
+        queryset = self.filter_queryset(self.get_queryset()).filter(pk__in=ids)
+        immediate, defer = queryset.query.deferred_loading
+        if immediate and not defer and 'status' not in immediate:
+            queryset = queryset.only(*immediate, 'status')
+        rows = {row.pk: row for row in queryset}
+        active = [rows[pk] for pk in ids if pk in rows and rows[pk].status == Property.Status.ACTIVE]
+        return Response({
+            'results': self.get_serializer(active, many=True).data,
+            'missing': [pk for pk in ids if pk not in rows],
+            'inactive': [pk for pk in ids if pk in rows and rows[pk].status != Property.Status.ACTIVE],
+        })
@@ -1,32 +1,107 @@
-from drf_spectacular.utils import extend_schema
+import asyncio
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, FloatField, Max, Min, Q
+from django.db.models.functions import Cast, Round
+from django.http import Http404, JsonResponse
+from django.views import View
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import AllowAny
-from apps.Serializers import PropertySerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.Serializers.filter_serializers import PropertyListSerializer
 from apps.Serializers.home_page_serializers import ResidentialComplexSerializer, VideoSerializer, BlogSerializer, \
     StaticPageSerializer
-from apps.models import Property, Video, Blog, StaticPage
+from apps.Views.filter_views import FIELDSET_PARAMETERS
+from apps.cache import generations, get_cache
+from apps.mixins import CachedResponseMixin, SerializerPrefetchMixin, apply_prefetch_plan, get_prefetch_plan
+from apps.models import Property, Video, Blog, StaticPage, ResidentialComplex
+from apps.pagination import parse_limit
+from apps.prerender import PrerenderedListMixin, get_rendered, prerendered_response
+from apps.vip import vip_feed
 
+logger = logging.getLogger(__name__)
 
-@extend_schema(tags=["Home"])
-class VipPropertyView(ListAPIView):
-    serializer_class = PropertySerializer
+
+def complex_queryset():
+    """Complexes with at least one active unit, annotated with the aggregates of their active units."""
+    active = Q(property__status=Property.Status.ACTIVE)
+    per_m2 = Cast('property__price', FloatField()) / Cast('property__area', FloatField())
+    sized = active & Q(property__area__gt=0)
+    return ResidentialComplex.objects.annotate(
+        units=Count('property', filter=active),
+        min_price=Min('property__price', filter=active),
+        max_price=Max('property__price', filter=active),
+        min_price_per_m2=Round(Min(per_m2, filter=sized), 2),
+        max_price_per_m2=Round(Max(per_m2, filter=sized), 2),
+        commissioning_date=Min('property__commissioning_date', filter=active),
+    ).filter(units__gt=0)
+
+
+def complex_rooms_queryset(ids):
+    queryset = Property.objects.filter(residential_complex_id__in=ids, status=Property.Status.ACTIVE)
+    return queryset.values_list('residential_complex_id', 'room').distinct().order_by('room')
+
+
+@extend_schema(
+    tags=["Home"],
+    parameters=[
+        OpenApiParameter(name="limit", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                         description="Number of listings to return (default 20, at most 50)"),
+        *FIELDSET_PARAMETERS,
+    ],
+)
+class VipPropertyView(SerializerPrefetchMixin, ListAPIView):
+    """A weighted random pick of active VIP and premium listings, different on every request."""
+    serializer_class = PropertyListSerializer
     permission_classes = [AllowAny]
+    filter_backends = []
+    pagination_class = None
+    default_limit = 20
+    max_limit = 50
 
     def get_queryset(self):
-        return Property.objects.filter(label='vip')
+        return Property.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        ids = vip_feed.sample(parse_limit(request.query_params.get('limit'), self.default_limit, self.max_limit))
+        rows = {row.pk: row for row in self.filter_queryset(self.get_queryset()).filter(pk__in=ids)}
+        serializer = self.get_serializer([rows[pk] for pk in ids if pk in rows], many=True)
+        return Response(serializer.data)
 
 
 @extend_schema(tags=["Home"])
-class ResidentialComplexView(ListAPIView):
+class ResidentialComplexView(CachedResponseMixin, ListAPIView):
+    """
+    Complexes with at least one active unit. The aggregates come from one grouped query
+    over the page; the room counts on offer from one more query for the page's complexes.
+    """
     serializer_class = ResidentialComplexSerializer
     permission_classes = [AllowAny]
+    filter_backends = []
+    cache_models = (Property, ResidentialComplex)
 
     def get_queryset(self):
-        return Property.objects.filter(residential_complex__isnull=False)
+        return complex_queryset()
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        rooms = defaultdict(list)
+        for complex_id, room in complex_rooms_queryset([row.pk for row in page]):
+            rooms[complex_id].append(room)
+        for row in page:
+            row.rooms = rooms[row.pk]
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
 
 
 @extend_schema(tags=["Home"])
-class VideoView(ListAPIView):
+class VideoView(SerializerPrefetchMixin, ListAPIView):
     serializer_class = VideoSerializer
     permission_classes = [AllowAny]
 
@@ -35,18 +110,123 @@ class VideoView(ListAPIView):
 
 
 @extend_schema(tags=["Home"])
-class BlogView(ListAPIView):
+class BlogView(PrerenderedListMixin, CachedResponseMixin, ListAPIView):
+    """The first page is served from pre-rendered, precompressed bytes."""
     serializer_class = BlogSerializer
     permission_classes = [AllowAny]
+    cache_models = (Blog,)
+    prerendered = 'blogs'
 
     def get_queryset(self):
         return Blog.objects.all()
 
 
+@extend_schema(tags=["Home"], responses=BlogSerializer)
+class BlogDetailView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, slug, *args, **kwargs):
+        entry = get_rendered('blogs', request, slug)
+        if entry is None:
+            raise Http404
+        return prerendered_response(request, entry)
+
+
 @extend_schema(tags=["Home"])
-class StaticPageView(ListAPIView):
+class StaticPageView(PrerenderedListMixin, ListAPIView):
+    """The first page is served from pre-rendered, precompressed bytes."""
     serializer_class = StaticPageSerializer
     permission_classes = [AllowAny]
+    prerendered = 'static_pages'
 
     def get_queryset(self):
         return StaticPage.objects.all()
+
+
+@extend_schema(tags=["Home"], responses=StaticPageSerializer)
+class StaticPageDetailView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, slug, *args, **kwargs):
+        entry = get_rendered('static_pages', request, slug)
+        if entry is None:
+            raise Http404
+        return prerendered_response(request, entry)
+
+
+def vip_section(request, limit):
+    ids = vip_feed.sample(limit)
+    plan = get_prefetch_plan(PropertyListSerializer, Property)
+    rows = {row.pk: row for row in apply_prefetch_plan(Property.objects.filter(pk__in=ids), plan)}
+    return PropertyListSerializer([rows[pk] for pk in ids if pk in rows], many=True,
+                                  context={'request': request}).data
+
+
+def residential_section(request, limit):
+    page = list(complex_queryset().order_by('-id')[:limit])
+    rooms = defaultdict(list)
+    for complex_id, room in complex_rooms_queryset([row.pk for row in page]):
+        rooms[complex_id].append(room)
+    for row in page:
+        row.rooms = rooms[row.pk]
+    return ResidentialComplexSerializer(page, many=True, context={'request': request}).data
+
+
+def latest_section(model, serializer_class):
+    def section(request, limit):
+        rows = model.objects.order_by('-id')[:limit]
+        return serializer_class(rows, many=True, context={'request': request}).data
+    return section
+
+
+class HomeView(View):
+    """
+    The home screen in one request. Each section runs in its own worker thread with its own
+    database connection (``thread_sensitive=False``), gathered with ``asyncio.gather``, and is
+    cached on its own under the generations of the models it reads. A section that fails or
+    runs past ``HOME_SECTION_TIMEOUT`` comes back as ``null``; its thread finishes in the
+    background without holding up the others. ``vip`` is a fresh weighted rotation each time,
+    so it is never cached. ``<section>_limit=`` sizes one section.
+    """
+    # name: (builder, default limit, cached models or None for uncached)
+    sections = {
+        'vip': (vip_section, 10, None),
+        'residential_complexes': (residential_section, 10, (Property, ResidentialComplex)),
+        'videos': (latest_section(Video, VideoSerializer), 10, (Video,)),
+        'blogs': (latest_section(Blog, BlogSerializer), 5, (Blog,)),
+        'static_pages': (latest_section(StaticPage, StaticPageSerializer), 20, (StaticPage,)),
+    }
+    max_limit = 50
+
+    def build(self, request, name):
+        builder, default, models = self.sections[name]
+        limit = parse_limit(request.GET.get(f'{name}_limit'), default, self.max_limit)
+        try:
+            if models is None:
+                return builder(request, limit)
+            versions = '.'.join(str(version) for version in generations(models))
+            key = f'home:{name}:{limit}:{request.get_host()}:{versions}'
+            cache = get_cache()
+            data = cache.get(key)
+            if data is None:
+                data = builder(request, limit)
+                cache.set(key, data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+            return data
+        finally:
+            # worker threads outlive the request, so their connections are released here
+            close_old_connections()
+
+    async def section(self, request, name):
+        build = sync_to_async(self.build, thread_sensitive=False)
+        try:
+            return await asyncio.wait_for(build(request, name), getattr(settings, 'HOME_SECTION_TIMEOUT', 2))
+        except asyncio.TimeoutError:
+            logger.warning('Home section %s timed out', name)
+        except Exception:
+            logger.exception('Home section %s failed', name)
+        return None
+
+    async def get(self, request, *args, **kwargs):
+        names = list(self.sections)
+        results = await asyncio.gather(*(self.section(request, name) for name in names))
+        return JsonResponse(dict(zip(names, results)))
@@ -11,9 +11,12 @@ from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_201_CR
 from apps.Serializers import UserProfileSerializer, UserUpdateSerializer, UserBalanceSerializer, \
     UserBalanceUpdateSerializer, UserMessageSerializer, UserWishlistSerializer, PropertySerializer, \
     UserTariffSerializer, UserTransactionSerializer, SendMessageSerializer, DeactivatePropertySerializer, \
-    UserUpdateWishlistSerializer, DeletePropertySerializer
+    UserUpdateWishlistSerializer, DeletePropertySerializer, PropertyListSerializer
+from apps.Views.filter_views import FIELDSET_PARAMETERS
 from apps.filters import PropertyFilter, WishlistFilter
+from apps.mixins import SerializerPrefetchMixin
 from apps.models import Wishlist, Property, Transaction
+from apps.pagination import PROPERTY_ORDERINGS, CREATED_ORDERINGS
 
 
 @extend_schema(tags=["User"])
@@ -69,6 +72,7 @@ class UserBalanceUpdateView(UpdateAPIView):
 class UserMessageView(ListAPIView):
     serializer_class = UserMessageSerializer
     permission_classes = [IsAuthenticated]
+    cursor_orderings = CREATED_ORDERINGS
 
     def get_object(self):
         return self.request.user
@@ -123,32 +127,19 @@ class UserMessageView(ListAPIView):
             description="Sort results by: highest_price, lowest_price, less_viewed, popular, newest, oldest",
             enum=["highest_price", "lowest_price", "less_viewed", "popular", "newest", "oldest"],
         ),
+        *FIELDSET_PARAMETERS,
     ],
 )
-class UserPropertyView(ListAPIView):
-    serializer_class = PropertySerializer
+class UserPropertyView(SerializerPrefetchMixin, ListAPIView):
+    serializer_class = PropertyListSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_class = PropertyFilter
-    ordering = ['-created_at']
+    cursor_orderings = PROPERTY_ORDERINGS
+    cursor_default_ordering = 'newest'
 
     def get_queryset(self):
-        queryset = Property.objects.filter(user=self.request.user)
-        ordering = self.request.query_params.get('ordering', None)
-        if ordering:
-            if ordering == 'highest_price':
-                queryset = queryset.order_by('-price')
-            elif ordering == 'lowest_price':
-                queryset = queryset.order_by('price')
-            elif ordering == 'less_viewed':
-                queryset = queryset.order_by('views')
-            elif ordering == 'popular':
-                queryset = queryset.order_by('-views')
-            elif ordering == 'newest':
-                queryset = queryset.order_by('-created_at')
-            elif ordering == 'oldest':
-                queryset = queryset.order_by('created_at')
-        return queryset
+        return Property.objects.filter(user=self.request.user)
 
 
 @extend_schema(
@@ -185,33 +176,26 @@ class UserPropertyView(ListAPIView):
             description="Sort results by: highest_price, lowest_price, less_viewed, popular, newest, oldest",
             enum=["highest_price", "lowest_price", "less_viewed", "popular", "newest", "oldest"],
         ),
+        *FIELDSET_PARAMETERS,
     ],
 )
-class UserWishlistView(ListAPIView):
+class UserWishlistView(SerializerPrefetchMixin, ListAPIView):
     serializer_class = UserWishlistSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_class = WishlistFilter
-    ordering_fields = ['property__price', 'property__view_count', 'created_at']
-    ordering = ['-created_at']
+    cursor_orderings = {
+        'newest': ('-id',),
+        'oldest': ('id',),
+        'highest_price': ('-property__price', '-id'),
+        'lowest_price': ('property__price', 'id'),
+        'popular': ('-property__views', '-id'),
+        'less_viewed': ('property__views', 'id'),
+    }
+    cursor_default_ordering = 'newest'
 
     def get_queryset(self):
-        queryset = Wishlist.objects.filter(user=self.request.user)
-        ordering = self.request.query_params.get('ordering', None)
-        if ordering:
-            if ordering == 'highest_price':
-                queryset = queryset.order_by('-property__price')
-            elif ordering == 'lowest_price':
-                queryset = queryset.order_by('property__price')
-            elif ordering == 'less_viewed':
-                queryset = queryset.order_by('property__view_count')
-            elif ordering == 'popular':
-                queryset = queryset.order_by('-property__view_count')
-            elif ordering == 'newest':
-                queryset = queryset.order_by('-created_at')
-            elif ordering == 'oldest':
-                queryset = queryset.order_by('created_at')
-        return queryset
+        return Wishlist.objects.filter(user=self.request.user)
 
 
 @extend_schema(tags=["User"])
@@ -230,6 +214,7 @@ class UserTariffView(ListAPIView):
 class UserTransactionView(ListAPIView):
     serializer_class = UserTransactionSerializer
     permission_classes = [IsAuthenticated]
+    cursor_orderings = CREATED_ORDERINGS
 
     def get_object(self):
         return self.request.user
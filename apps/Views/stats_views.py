@@ -0,0 +1,89 @@
+from django.db.models import Sum
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import RetrieveAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from apps.locations import parse_id
+from apps.market import DIMENSIONS, percentiles
+from apps.mixins import CachedResponseMixin
+from apps.models import MarketStat, Property, District, City, Region, Category
+from apps.Serializers.stats_serializers import MarketStatsSerializer
+
+DIMENSION_MODELS = {
+    MarketStat.Dimension.DISTRICT: District,
+    MarketStat.Dimension.CITY: City,
+    MarketStat.Dimension.REGION: Region,
+    MarketStat.Dimension.CATEGORY: Category,
+}
+
+
+def summary(values):
+    if values is None:
+        return None
+    return dict(zip(('p25', 'p50', 'p75'), (round(value, 2) for value in values)))
+
+
+@extend_schema(
+    tags=["Stats"],
+    parameters=[
+        OpenApiParameter(name="dimension", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=True,
+                         enum=list(DIMENSIONS), description="Group listings by this location or category"),
+        OpenApiParameter(name="ids", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                         description="Comma-separated ids of the groups to return; all groups when omitted"),
+        OpenApiParameter(name="type", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                         enum=list(Property.Type.values), description="Only sale or only rent listings"),
+        OpenApiParameter(name="room", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                         description="Only listings with this many rooms"),
+    ],
+)
+class MarketStatsView(CachedResponseMixin, RetrieveAPIView):
+    """Listing counts, average price and price per m2 from MarketStat, with price percentiles."""
+    serializer_class = MarketStatsSerializer
+    permission_classes = [AllowAny]
+    cache_models = (Property, MarketStat, District, City, Region, Category)
+
+    def retrieve(self, request, *args, **kwargs):
+        params = request.query_params
+        dimension = params.get('dimension')
+        if dimension not in DIMENSIONS:
+            raise ValidationError({'dimension': f"Choose one of: {', '.join(DIMENSIONS)}"})
+        kind = params.get('type') or None
+        if kind is not None and kind not in Property.Type.values:
+            raise ValidationError({'type': f"Choose one of: {', '.join(Property.Type.values)}"})
+        keys = [parse_id(part.strip()) for part in params.get('ids', '').split(',') if part.strip()]
+        room = parse_id(params['room']) if params.get('room') else None
+        if None in keys or (params.get('room') and room is None):
+            raise ValidationError("ids and room must be non-negative integers.")
+
+        stats = MarketStat.objects.filter(dimension=dimension, count__gt=0)
+        if keys:
+            stats = stats.filter(key__in=keys)
+        if kind:
+            stats = stats.filter(type=kind)
+        if room is not None:
+            stats = stats.filter(room=room)
+        rows = stats.values('key', 'type').annotate(
+            listings=Sum('count'), price_sum=Sum('total_price'), area_sum=Sum('total_area'),
+        ).order_by('key', 'type')
+        rows = list(rows)
+        names = dict(DIMENSION_MODELS[dimension].objects.filter(pk__in={row['key'] for row in rows})
+                     .values_list('id', 'name'))
+        spread = percentiles(dimension, keys, kind, room)
+
+        results = []
+        for row in rows:
+            group = spread.get((row['key'], row['type']), {})
+            results.append({
+                'id': row['key'],
+                'name': names.get(row['key']),
+                'type': row['type'],
+                'count': row['listings'],
+                'average_price': round(float(row['price_sum']) / row['listings'], 2),
+                'price_per_m2': round(float(row['price_sum']) / float(row['area_sum']), 2) if row['area_sum'] else None,
+                'price': summary(group.get('price')),
+                'price_per_m2_percentiles': summary(group.get('price_per_m2')),
+            })
+        return Response({'dimension': dimension, 'room': room, 'results': results})
@@ -1,23 +1,81 @@
 from django.contrib import admin
+from .locations import location_resolver, parse_id
 from .models import (
     User, Property, Blog,
     Video, ResidentialComplex, Amenity, Category, Image, Tariff,
-    StaticPage, Metro, Country, Region, City, District
+    StaticPage, Metro, Country, Region, City, District, QueryShape, MarketStat
 )
+from .pagination import EstimatedCountPaginator
+from .search import get_search_backend
 
 
-class UserAdmin(admin.ModelAdmin):
+class RelatedInputFilter(admin.SimpleListFilter):
+    """
+    A text box for a foreign key instead of a list of every related row. Takes ids, slugs or
+    names, resolved through the cached location resolver.
+    """
+    template = 'admin/input_filter.html'
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        # the filter is only rendered when this is non-empty
+        return (('', ''),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [(name, value) for name, values in changelist.get_filters_params().items()
+                                     if name != self.parameter_name for value in values]
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        model = queryset.model._meta.get_field(self.field_name).related_model
+        ids, _ = location_resolver.resolve(model, self.value())
+        return queryset.filter(**{f'{self.field_name}_id__in': ids})
+
+
+def related_input_filter(field_name, title):
+    return type(f'{field_name.title().replace("_", "")}InputFilter', (RelatedInputFilter,),
+                {'field_name': field_name, 'parameter_name': field_name, 'title': title})
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables too big to count or scan on every page load."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)
+
+
+class UserAdmin(LargeTableAdmin):
     list_display = ('id', 'phone_number', 'first_name', 'last_name', 'role', 'balance',
                     'organization', 'is_active', 'is_staff', 'created_at')
     list_filter = ('role', 'is_active', 'is_staff')
     search_fields = ('phone_number', 'first_name', 'last_name')
 
 
-class PropertyAdmin(admin.ModelAdmin):
+class PropertyAdmin(LargeTableAdmin):
     list_display = ('id', 'name', 'type', 'price', 'status', 'user')
-    list_filter = ('type', 'status', 'residential_complex', 'label', 'city', 'region', 'metro', 'district',
+    list_select_related = ('user',)
+    list_filter = ('type', 'status', 'label', related_input_filter('residential_complex', 'residential complex'),
+                   related_input_filter('city', 'city'), related_input_filter('region', 'region'),
+                   related_input_filter('metro', 'metro'), related_input_filter('district', 'district'),
                    'created_at')
     search_fields = ('name', 'address', 'description')
+    autocomplete_fields = ('user', 'category', 'residential_complex', 'country', 'region', 'city', 'district',
+                           'metro', 'amenities')
+    # written by the buffered counter, which Property.save never overwrites
+    readonly_fields = ('views', 'saves')
+
+    def get_search_results(self, request, queryset, search_term):
+        # the full-text index instead of one LIKE scan per search field
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        pk = parse_id(search_term)
+        if pk is not None:
+            return queryset.filter(pk=pk), False
+        return get_search_backend().search(queryset, search_term), False
 
 
 class AmenityAdmin(admin.ModelAdmin):
@@ -33,12 +91,14 @@ class BlogAdmin(admin.ModelAdmin):
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'parent')
+    list_select_related = ('parent',)
     search_fields = ('name',)
     exclude = ('slug',)
 
 
 class CityAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'region')
+    list_select_related = ('region',)
     search_fields = ('name',)
     exclude = ('slug',)
 
@@ -51,12 +111,16 @@ class CountryAdmin(admin.ModelAdmin):
 
 class DistrictAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'city')
+    list_select_related = ('city',)
     search_fields = ('name',)
     exclude = ('slug',)
 
 
-class ImageAdmin(admin.ModelAdmin):
+class ImageAdmin(LargeTableAdmin):
     list_display = ('id', 'image', 'property')
+    list_select_related = ('property',)
+    autocomplete_fields = ('property',)
+    search_fields = ('=property__id',)
 
 
 class MetroAdmin(admin.ModelAdmin):
@@ -67,6 +131,7 @@ class MetroAdmin(admin.ModelAdmin):
 
 class RegionAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'country')
+    list_select_related = ('country',)
     search_fields = ('name',)
     exclude = ('slug',)
 
@@ -85,12 +150,28 @@ class StaticPageAdmin(admin.ModelAdmin):
 
 class TariffAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'price', 'duration_days', 'status', 'label', 'user')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     list_filter = ('status', 'label',)
     search_fields = ('name',)
 
 
-class VideoAdmin(admin.ModelAdmin):
+class VideoAdmin(LargeTableAdmin):
     list_display = ('id', 'video', 'property')
+    list_select_related = ('property',)
+    autocomplete_fields = ('property',)
+    search_fields = ('=property__id',)
+
+
+class QueryShapeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'path', 'filters', 'ordering', 'hits', 'total_ms', 'max_ms', 'last_seen')
+    search_fields = ('filters',)
+    ordering = ('-total_ms',)
+
+
+class MarketStatAdmin(admin.ModelAdmin):
+    list_display = ('id', 'dimension', 'key', 'type', 'room', 'count', 'total_price', 'total_area')
+    list_filter = ('dimension', 'type')
 
 
 admin.site.register(User, UserAdmin)
@@ -108,3 +189,5 @@ admin.site.register(Country, CountryAdmin)
 admin.site.register(Region, RegionAdmin)
 admin.site.register(City, CityAdmin)
 admin.site.register(District, DistrictAdmin)
+admin.site.register(QueryShape, QueryShapeAdmin)
+admin.site.register(MarketStat, MarketStatAdmin)
@@ -0,0 +1,46 @@
+from collections import defaultdict
+
+from django.db.models import F
+from django.utils import timezone
+
+# Amenity ids 1..63 get a bit in Property.amenity_mask; larger ids fall back to the M2M table.
+MASK_BITS = 63
+
+
+def amenity_bit(pk):
+    return 1 << (pk - 1) if 0 < pk <= MASK_BITS else 0
+
+
+def amenity_mask(amenity_ids):
+    mask = 0
+    for pk in amenity_ids:
+        mask |= amenity_bit(pk)
+    return mask
+
+
+def refresh_amenity_masks(property_ids):
+    """Recomputes ``amenity_mask`` from the M2M table, one UPDATE per distinct mask; also moves ``updated_at``."""
+    from apps.models import Property
+
+    property_ids = set(property_ids)
+    amenity_ids = defaultdict(list)
+    through = Property.amenities.through.objects.filter(property_id__in=property_ids)
+    for property_id, amenity_id in through.values_list('property_id', 'amenity_id'):
+        amenity_ids[property_id].append(amenity_id)
+    by_mask = defaultdict(list)
+    for property_id in property_ids:
+        by_mask[amenity_mask(amenity_ids[property_id])].append(property_id)
+    now = timezone.now()
+    for mask, ids in by_mask.items():
+        Property.objects.filter(pk__in=ids).update(amenity_mask=mask, updated_at=now)
+    return {property_id: amenity_mask(amenity_ids[property_id]) for property_id in property_ids}
+
+
+def clear_amenity_bit(amenity_id):
+    from apps.models import Property
+
+    bit = amenity_bit(amenity_id)
+    if bit:
+        Property.objects.alias(has_bit=F('amenity_mask').bitand(bit)).filter(has_bit=bit).update(
+            amenity_mask=F('amenity_mask').bitand(~bit)
+        )
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def generation_key(model):
+    return f'gen:{model._meta.label_lower}'
+
+
+def generations(models):
+    """Current generation of every model; a missing counter starts at a fresh, never reused value."""
+    cache = get_cache()
+    keys = [generation_key(model) for model in models]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump_generation(model):
+    cache = get_cache()
+    key = generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def record_metric(name):
+    cache = get_cache()
+    key = f'metrics:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def metrics():
+    cache = get_cache()
+    hits, misses = cache.get('metrics:hits', 0), cache.get('metrics:misses', 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 4) if total else None}
+
+
+def normalized_query(request):
+    # names are sorted, but repeated values keep their order: filters read the last one
+    params = sorted((name, values) for name, values in request.query_params.lists() if any(values))
+    return '&'.join(f'{name}={",".join(values)}' for name, values in params)
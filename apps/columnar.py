@@ -0,0 +1,235 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+
+from apps.models import Property
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value - EPOCH) // MICROSECOND
+
+
+class PropertyColumnIndex:
+    """
+    Per-process copy of the filterable Property columns as NumPy arrays.
+
+    Rows are kept sorted by id. Enums are stored as small int codes (-1 for NULL) and
+    datetimes as microseconds. ``refresh`` only re-reads rows whose ``updated_at``
+    moved past the last load, and rechecks the id set when the live row count disagrees.
+    Published arrays are never written to: every change builds new ones and swaps them
+    in under ``lock``, so readers keep a consistent snapshot.
+    """
+    numeric_fields = ('price', 'area', 'room', 'floor', 'views', 'saves')
+    enum_fields = ('type', 'building_material', 'renovation_needed', 'repair', 'label', 'residential_type',
+                   'status')
+    time_fields = ('created_at',)
+    # updated_at is read again from this far back, so rows committed late are not missed
+    overlap = timedelta(seconds=5)
+
+    def __init__(self, refresh_interval=5):
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.codes = {
+            field: {value: code for code, (value, label) in enumerate(Property._meta.get_field(field).choices)}
+            for field in self.enum_fields
+        }
+        self.reset()
+
+    @property
+    def fields(self):
+        return self.numeric_fields + self.enum_fields + self.time_fields
+
+    def reset(self):
+        self.columns = None
+        self.watermark = None
+        self.refreshed_at = 0.0
+
+    def refresh(self, force=False):
+        if not force and self.columns is not None and time.monotonic() - self.refreshed_at < self.refresh_interval:
+            return self.columns
+        with self.lock:
+            if force or self.columns is None or time.monotonic() - self.refreshed_at >= self.refresh_interval:
+                queryset = Property.objects.all()
+                incremental = self.columns is not None and self.watermark is not None
+                if incremental:
+                    queryset = queryset.filter(updated_at__gte=self.watermark - self.overlap)
+                self.merge(self.load(queryset))
+                if incremental:
+                    self.reconcile()
+                self.refreshed_at = time.monotonic()
+        return self.columns
+
+    def reconcile(self):
+        """Drops rows deleted by other processes and loads rows the watermark missed."""
+        columns = self.columns
+        if Property.objects.count() == int(columns['alive'].sum()):
+            return
+        live = np.fromiter(Property.objects.order_by('id').values_list('id', flat=True).iterator(), dtype=np.int64)
+        self.columns = dict(columns, alive=np.isin(columns['id'], live))
+        missing = live[~np.isin(live, columns['id'])].tolist()
+        for start in range(0, len(missing), 500):
+            self.merge(self.load(Property.objects.filter(pk__in=missing[start:start + 500])))
+
+    def load(self, queryset):
+        names = ('id',) + self.fields + ('updated_at',)
+        rows = list(queryset.order_by('id').values_list(*names))
+        if rows:
+            watermark = max(row[-1] for row in rows)
+            if self.watermark is None or watermark > self.watermark:
+                self.watermark = watermark
+        values = list(zip(*rows)) if rows else [()] * len(names)
+        columns = {'id': np.array(values[0], dtype=np.int64)}
+        for name, column in zip(names[1:-1], values[1:-1]):
+            columns[name] = self.encode_column(name, column)
+        columns['alive'] = np.ones(len(columns['id']), dtype=bool)
+        return columns
+
+    def encode_column(self, name, values):
+        if name in self.enum_fields:
+            codes = self.codes[name]
+            return np.array([codes.get(value, -1) for value in values], dtype=np.int16)
+        if name in self.time_fields:
+            return np.array([to_micros(value) for value in values], dtype=np.int64)
+        return np.array([float(value) for value in values], dtype=np.float64)
+
+    def encode_value(self, name, value):
+        if name in self.enum_fields:
+            return self.codes[name].get(value, -2)
+        if name in self.time_fields:
+            return to_micros(value)
+        return float(Decimal(str(value)))
+
+    def merge(self, changed):
+        if self.columns is None:
+            self.columns = changed
+            return
+        current = self.columns
+        ids = current['id']
+        positions = np.searchsorted(ids, changed['id'])
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == changed['id'][found]
+        if found.any():
+            current = {name: column.copy() for name, column in current.items()}
+            for name, column in current.items():
+                column[positions[found]] = changed[name][found]
+        if found.all():
+            self.columns = current
+            return
+        merged = {name: np.concatenate([column, changed[name][~found]]) for name, column in current.items()}
+        if len(ids) and merged['id'][len(ids):].min() < ids[-1]:
+            order = np.argsort(merged['id'], kind='stable')
+            merged = {name: column[order] for name, column in merged.items()}
+        self.columns = merged
+
+    def increment(self, field, deltas):
+        """Applies counter increments written with ``update()``, which leaves ``updated_at`` alone."""
+        with self.lock:
+            columns = self.columns
+            if columns is None or not deltas:
+                return
+            ids = np.fromiter(deltas, dtype=np.int64, count=len(deltas))
+            amounts = np.fromiter(deltas.values(), dtype=np.float64, count=len(deltas))
+            positions = np.searchsorted(columns['id'], ids)
+            found = positions < len(columns['id'])
+            found[found] = columns['id'][positions[found]] == ids[found]
+            column = columns[field].copy()
+            np.add.at(column, positions[found], amounts[found])
+            self.columns = dict(columns, **{field: column})
+
+    def discard(self, pk):
+        with self.lock:
+            columns = self.columns
+            if columns is None:
+                return
+            position = np.searchsorted(columns['id'], pk)
+            if position < len(columns['id']) and columns['id'][position] == pk:
+                alive = columns['alive'].copy()
+                alive[position] = False
+                self.columns = dict(columns, alive=alive)
+
+    def filters_from(self, filterset):
+        """Translates a bound, valid filterset into index predicates, or None if it uses anything else."""
+        filters = []
+        for name, value in filterset.form.cleaned_data.items():
+            if value in (None, ''):
+                continue
+            declared = filterset.filters[name]
+            if declared.method is not None or declared.field_name not in self.fields or \
+                    declared.lookup_expr not in ('exact', 'gte', 'lte'):
+                return None
+            filters.append((declared.field_name, declared.lookup_expr, value))
+        return filters
+
+    def mask(self, columns, filters):
+        mask = columns['alive'].copy()
+        for name, lookup, value in filters:
+            column, value = columns[name], self.encode_value(name, value)
+            if lookup == 'exact':
+                mask &= column == value
+            elif lookup == 'gte':
+                mask &= column >= value
+            else:
+                mask &= column <= value
+        return mask
+
+    def sort_keys(self, columns, fields, rows=None):
+        keys = []
+        for field in fields:
+            name = field.lstrip('-')
+            column = columns[name] if rows is None else columns[name][rows]
+            keys.append(-column if field.startswith('-') else column)
+        return keys
+
+    def query(self, filters, fields, position=None, limit=20):
+        """
+        Returns ``(ids, count)``: the ids of the first ``limit`` matches in ``fields`` order after the
+        keyset ``position``, and the number of rows matching ``filters``. Returns None for orderings
+        the index does not hold.
+        """
+        if any(field.lstrip('-') not in self.time_fields + self.numeric_fields + ('id',) for field in fields):
+            return None
+        columns = self.refresh()
+        mask = self.mask(columns, filters)
+        count = int(mask.sum())
+        if position is not None:
+            encoded = [self.encode_value(field.lstrip('-'), value) if field.lstrip('-') != 'id' else int(value)
+                       for field, value in zip(fields, position)]
+            keys = self.sort_keys(columns, fields)
+            after = np.zeros(len(mask), dtype=bool)
+            equal = np.ones(len(mask), dtype=bool)
+            for field, key, value in zip(fields, keys, encoded):
+                value = -value if field.startswith('-') else value
+                after |= equal & (key > value)
+                equal &= key == value
+            mask &= after
+        rows = np.flatnonzero(mask)
+        keys = self.sort_keys(columns, fields, rows)
+        if len(rows) > limit:
+            primary = keys[0]
+            threshold = primary[np.argpartition(primary, limit - 1)[:limit]].max()
+            candidates = primary <= threshold
+            rows, keys = rows[candidates], [key[candidates] for key in keys]
+        order = np.lexsort(keys[::-1])[:limit]
+        return columns['id'][rows[order]].tolist(), count
+
+
+column_index = PropertyColumnIndex(getattr(settings, 'PROPERTY_COLUMN_INDEX_REFRESH', 5))
+
+
+def get_column_index():
+    if np is None or not getattr(settings, 'PROPERTY_COLUMN_INDEX', False):
+        return None
+    return column_index
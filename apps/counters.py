@@ -0,0 +1,125 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from apps.columnar import column_index
+from apps.models import Property
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedCounter:
+    """
+    Counts hits per row in memory and writes them every ``interval`` seconds as one
+    ``F(field) + n`` update per distinct ``n``, all in a single transaction. By default the
+    hit that finds the buffer older than ``interval`` writes it, and a timer writes whatever
+    is left once hits stop coming; with ``background`` a daemon thread does, on its own
+    database connection. The buffer is flushed once more at exit.
+    """
+
+    def __init__(self, model, field, interval=2, background=False):
+        self.model = model
+        self.field = field
+        self.interval = interval
+        self.background = background
+        self.lock = threading.Lock()
+        self.buffer = defaultdict(int)
+        self.flushed_at = time.monotonic()
+        self.stopped = threading.Event()
+        self.started = False
+        self.timer = None
+
+    def increment(self, pk, amount=1):
+        with self.lock:
+            self.buffer[pk] += amount
+            if not self.started:
+                self.start()
+            due = not self.background and time.monotonic() - self.flushed_at >= self.interval
+            if not due and not self.background and self.timer is None:
+                self.schedule()
+        if due:
+            self.flush_logged()
+
+    def start(self):
+        self.started = True
+        atexit.register(self.stop)
+        if self.background:
+            threading.Thread(target=self.run, name=f'{self.field}-counter', daemon=True).start()
+
+    def schedule(self):
+        self.timer = threading.Timer(self.interval, self.flush_idle)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush_idle(self):
+        with self.lock:
+            self.timer = None
+        self.flush_connected()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.flush_connected()
+
+    def flush_connected(self):
+        # like a request: drop broken or expired connections before and after the work
+        close_old_connections()
+        self.flush_logged()
+        close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+        self.discard_timer()
+        self.flush_logged()
+
+    def discard(self):
+        """Drops the buffered hits without writing them."""
+        with self.lock:
+            self.buffer.clear()
+        self.discard_timer()
+
+    def discard_timer(self):
+        with self.lock:
+            timer, self.timer = self.timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def flush_logged(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Flushing %s.%s failed", self.model.__name__, self.field)
+
+    def flush(self):
+        with self.lock:
+            buffer, self.buffer = dict(self.buffer), defaultdict(int)
+            self.flushed_at = time.monotonic()
+        if not buffer:
+            return
+        groups = defaultdict(list)
+        for pk, amount in buffer.items():
+            if amount:
+                groups[amount].append(pk)
+        try:
+            with transaction.atomic():
+                for amount, pks in groups.items():
+                    self.model.objects.filter(pk__in=pks).update(**{self.field: F(self.field) + amount})
+        except Exception:
+            # put the hits back so the next flush retries them
+            with self.lock:
+                for pk, amount in buffer.items():
+                    self.buffer[pk] += amount
+            raise
+        if self.field in column_index.numeric_fields:
+            column_index.increment(self.field, buffer)
+
+
+view_counter = BufferedCounter(Property, 'views', getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 2),
+                               getattr(settings, 'VIEW_COUNTER_BACKGROUND_FLUSH', False))
+save_counter = BufferedCounter(Property, 'saves', getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 2),
+                               getattr(settings, 'VIEW_COUNTER_BACKGROUND_FLUSH', False))
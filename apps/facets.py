@@ -0,0 +1,48 @@
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+from apps.models import Property
+
+# facet name -> (grouped column, column holding the display label for foreign keys)
+FACETS = {
+    'type': ('type', None),
+    'category': ('category', 'category__name'),
+    'rooms': ('room', None),
+    'building_material': ('building_material', None),
+    'renovation_needed': ('renovation_needed', None),
+    'repair': ('repair', None),
+    'label': ('label', None),
+    'residential_type': ('residential_type', None),
+    'city': ('city', 'city__name'),
+    'district': ('district', 'district__name'),
+    'metro': ('metro', 'metro__name'),
+}
+
+
+def parse_facets(value):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise ValidationError({'facets': f"Unknown facets: {', '.join(unknown)}. "
+                                         f"Available: {', '.join(FACETS)}"})
+    return list(dict.fromkeys(names))
+
+
+def facet_counts(queryset, names):
+    """Counts the filtered rows per value of every requested facet, one grouped query per facet."""
+    base = queryset.order_by().select_related(None).prefetch_related(None)
+    facets = {}
+    for name in names:
+        column, label_column = FACETS[name]
+        choices = dict(Property._meta.get_field(column).flatchoices)
+        columns = [column, label_column] if label_column else [column]
+        rows = base.values(*columns).annotate(count=Count('id', distinct=True)).order_by('-count', column)
+        facets[name] = [
+            {
+                'value': row[column],
+                'label': row[label_column] if label_column else choices.get(row[column], row[column]),
+                'count': row['count'],
+            }
+            for row in rows
+        ]
+    return facets
@@ -27,12 +27,19 @@ class WishlistFilter(django_filters.FilterSet):
 
 
 import django_filters
-from .models import Property
-from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from . import geo
+from .amenities import amenity_bit, amenity_mask
+from .models import Property, Amenity
+from .locations import location_resolver
+from .search import get_search_backend
+from django.db.models import F, Q
+from django.conf import settings
 
 
 class SearchPropertyFilter(django_filters.FilterSet):
     # Text-based filters
+    q = django_filters.CharFilter(method='filter_q')
     search = django_filters.CharFilter(field_name="address", lookup_expr='icontains')
     name = django_filters.CharFilter(field_name="name", lookup_expr='icontains')
     description = django_filters.CharFilter(field_name="description", lookup_expr='icontains')
@@ -59,14 +66,22 @@ class SearchPropertyFilter(django_filters.FilterSet):
 
     # ForeignKey filters
     residential_name = django_filters.CharFilter(field_name="residential_complex__name", lookup_expr='icontains')
-    city = django_filters.CharFilter(field_name="city__name", lookup_expr='icontains')
-    region = django_filters.CharFilter(field_name="region__name", lookup_expr='icontains')
-    metro = django_filters.CharFilter(field_name="metro__name", lookup_expr='icontains')
-    district = django_filters.CharFilter(field_name="district__name", lookup_expr='icontains')
-    country = django_filters.CharFilter(field_name="country__name", lookup_expr='icontains')
+    city = django_filters.CharFilter(method='filter_location')
+    region = django_filters.CharFilter(method='filter_location')
+    metro = django_filters.CharFilter(method='filter_location')
+    district = django_filters.CharFilter(method='filter_location')
+    country = django_filters.CharFilter(method='filter_location')
 
-    # ManyToManyField filter
+    # ManyToManyField filters
     amenities = django_filters.CharFilter(method='filter_amenities')
+    amenities_any = django_filters.CharFilter(method='filter_amenities_any')
+
+    # Geo filters
+    bbox = django_filters.CharFilter(method='filter_bbox')
+    polygon = django_filters.CharFilter(method='filter_polygon')
+    lat = django_filters.NumberFilter(method='filter_center')
+    lng = django_filters.NumberFilter(method='filter_center')
+    radius = django_filters.NumberFilter(method='filter_center')
 
     # Date filters
     commissioning_date = django_filters.DateFilter(field_name="commissioning_date", lookup_expr='exact')
@@ -80,21 +95,103 @@ class SearchPropertyFilter(django_filters.FilterSet):
     class Meta:
         model = Property
         fields = [
-            'search', 'name', 'description', 'type', 'category', 'building_material',
+            'q', 'search', 'name', 'description', 'type', 'category', 'building_material',
             'renovation_needed', 'repair', 'label', 'residential_type', 'status',
             'room', 'floor', 'min_area', 'max_area', 'min_price', 'max_price',
             'min_views', 'max_views', 'min_saves', 'max_saves',
             'residential_name',
-            'city', 'region', 'metro', 'district', 'country', 'amenities',
+            'city', 'region', 'metro', 'district', 'country', 'amenities', 'amenities_any',
+            'bbox', 'polygon', 'lat', 'lng', 'radius',
             'commissioning_date', 'min_commissioning_date', 'max_commissioning_date',
             'created_after', 'created_before', 'updated_after', 'updated_before'
         ]
 
+    def filter_queryset(self, queryset):
+        return self.filter_distance(super().filter_queryset(queryset))
+
+    def filter_distance(self, queryset):
+        lat, lng, radius = (self.form.cleaned_data.get(key) for key in ('lat', 'lng', 'radius'))
+        if lat is None or lng is None:
+            if radius is not None:
+                raise ValidationError({'radius': 'lat and lng are required with radius.'})
+            return queryset
+        lat, lng = float(lat), float(lng)
+        if not geo.valid_point(lat, lng):
+            raise ValidationError({'lat': 'lat must be within [-90, 90] and lng within [-180, 180].'})
+        if radius is None and self.data.get('ordering') == 'nearest':
+            radius = geo.NEAREST_RADIUS_KM
+        queryset = queryset.annotate(distance=geo.distance_expression(lat, lng))
+        if radius is not None:
+            radius = float(radius)
+            queryset = queryset.filter(geo.box_filter(*geo.radius_box(lat, lng, radius)), distance__lte=radius)
+        return queryset
+
+    def filter_center(self, queryset, name, value):
+        # lat, lng and radius are applied together in filter_distance
+        return queryset
+
+    def filter_bbox(self, queryset, name, value):
+        try:
+            south, west, north, east = (float(part) for part in value.split(','))
+        except ValueError:
+            raise ValidationError({'bbox': 'Expected south,west,north,east.'})
+        if not (geo.valid_point(south, west) and geo.valid_point(north, east)):
+            raise ValidationError({'bbox': 'Latitudes must be within [-90, 90] and longitudes within [-180, 180].'})
+        return queryset.filter(geo.box_filter(south, west, north, east))
+
+    def filter_polygon(self, queryset, name, value):
+        try:
+            polygon = [tuple(float(part) for part in point.split(',')) for point in value.split(';')]
+        except ValueError:
+            polygon = []
+        if len(polygon) < 3 or any(len(point) != 2 for point in polygon):
+            raise ValidationError({'polygon': 'Expected at least three lat,lng points separated by ";".'})
+        if not all(geo.valid_point(*point) for point in polygon):
+            raise ValidationError({'polygon': 'Latitudes must be within [-90, 90] and longitudes within [-180, 180].'})
+        lats, lngs = [point[0] for point in polygon], [point[1] for point in polygon]
+        candidates = queryset.filter(geo.box_filter(min(lats), min(lngs), max(lats), max(lngs)))
+        limit = getattr(settings, 'POLYGON_MAX_CANDIDATES', geo.POLYGON_MAX_CANDIDATES)
+        rows = list(candidates.order_by().values_list('id', 'latitude', 'longitude')[:limit + 1])
+        if len(rows) > limit:
+            raise ValidationError({'polygon': f'The polygon covers more than {limit} listings; draw a smaller one.'})
+        ids = [pk for pk, lat, lng in rows if geo.contains(polygon, float(lat), float(lng))]
+        return queryset.filter(id__in=ids)
+
+    def filter_q(self, queryset, name, value):
+        return get_search_backend().search(queryset, value)
+
     def filter_category(self, queryset, name, value):
         return queryset.filter(category__name__icontains=value)
 
+    def filter_location(self, queryset, name, value):
+        model = Property._meta.get_field(name).related_model
+        ids, unresolved = location_resolver.resolve(model, value)
+        condition = Q(**{f'{name}_id__in': ids}) if ids else Q(pk__in=[])
+        for part in unresolved:
+            condition |= Q(**{f'{name}__name__icontains': part})
+        return queryset.filter(condition)
+
     def filter_amenities(self, queryset, name, value):
-        amenity_names = [name.strip() for name in value.split(',') if name.strip()]
-        for amenity_name in amenity_names:
-            queryset = queryset.filter(amenities__name__iexact=amenity_name)
-        return queryset.distinct()
+        ids, unresolved = location_resolver.resolve(Amenity, value)
+        if unresolved:
+            return queryset.none()
+        mask = amenity_mask(ids)
+        if mask:
+            queryset = queryset.alias(amenities_all=F('amenity_mask').bitand(mask)).filter(amenities_all=mask)
+        for amenity_id in ids:
+            if not amenity_bit(amenity_id):
+                queryset = queryset.filter(pk__in=self.with_amenities([amenity_id]))
+        return queryset
+
+    def filter_amenities_any(self, queryset, name, value):
+        ids, unresolved = location_resolver.resolve(Amenity, value)
+        mask = amenity_mask(ids)
+        overflow = [amenity_id for amenity_id in ids if not amenity_bit(amenity_id)]
+        condition = Q(amenities_any__gt=0) if mask else Q(pk__in=[])
+        if overflow:
+            condition |= Q(pk__in=self.with_amenities(overflow))
+        return queryset.alias(amenities_any=F('amenity_mask').bitand(mask)).filter(condition)
+
+    def with_amenities(self, amenity_ids):
+        through = Property.amenities.through.objects.filter(amenity_id__in=amenity_ids)
+        return through.values('property_id')
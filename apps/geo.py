@@ -0,0 +1,105 @@
+import math
+
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 12
+EARTH_RADIUS_KM = 6371.0
+# ordering=nearest without a radius only looks this far, so it stays an index range scan
+NEAREST_RADIUS_KM = 50.0
+# polygon=... refines at most this many bounding-box candidates in Python
+POLYGON_MAX_CANDIDATES = 5000
+# the character after 'z', so [prefix, prefix + END) is every hash starting with prefix
+END = '{'
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    result, bits, char, even = [], 0, 0, True
+    while len(result) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            char |= 1 << (4 - bits)
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            result.append(BASE32[char])
+            bits, char = 0, 0
+    return ''.join(result)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell."""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def valid_point(latitude, longitude):
+    """Whether both coordinates are finite and on the globe."""
+    return (math.isfinite(latitude) and math.isfinite(longitude) and
+            -90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0)
+
+
+def cover(south, west, north, east, max_cells=16):
+    """
+    Geohash prefixes whose cells together cover the box, as few and as fine as ``max_cells``
+    allows; the box is clamped to the globe, and ``['']`` (every hash) when even the coarsest
+    cells would be too many.
+    """
+    south, north = max(south, -90.0), min(north, 90.0)
+    west, east = max(west, -180.0), min(east, 180.0)
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(math.floor((south + 90) / height), math.floor((north + 90) / height) + 1)
+        columns = range(math.floor((west + 180) / width), math.floor((east + 180) / width) + 1)
+        if len(rows) * len(columns) <= max_cells:
+            return sorted({
+                encode(min(-90 + (row + 0.5) * height, 90), min(-180 + (column + 0.5) * width, 180), precision)
+                for row in rows for column in columns
+            })
+    return ['']
+
+
+def box_filter(south, west, north, east):
+    """Geohash range scans narrowed to the exact box."""
+    prefixes = Q()
+    for prefix in cover(south, west, north, east):
+        prefixes |= Q(geohash__gte=prefix, geohash__lt=prefix + END)
+    return prefixes & Q(latitude__gte=south, latitude__lte=north, longitude__gte=west, longitude__lte=east)
+
+
+def radius_box(latitude, longitude, radius_km):
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    delta_lng = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return (max(latitude - delta_lat, -90.0), max(longitude - delta_lng, -180.0),
+            min(latitude + delta_lat, 90.0), min(longitude + delta_lng, 180.0))
+
+
+def distance_expression(latitude, longitude):
+    """Haversine distance in km from the point to each row's latitude/longitude."""
+    row_lat = Radians(Cast('latitude', FloatField()))
+    row_lng = Radians(Cast('longitude', FloatField()))
+    lat, lng = Value(math.radians(latitude)), Value(math.radians(longitude))
+    a = (Power(Sin((row_lat - lat) / 2), 2) +
+         Value(math.cos(math.radians(latitude))) * Cos(row_lat) * Power(Sin((row_lng - lng) / 2), 2))
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def contains(polygon, latitude, longitude):
+    """Ray casting point-in-polygon test; ``polygon`` is a list of (lat, lng) vertices."""
+    inside = False
+    previous = polygon[-1]
+    for current in polygon:
+        (lat1, lng1), (lat2, lng2) = previous, current
+        if (lat1 > latitude) != (lat2 > latitude):
+            crossing = lng1 + (latitude - lat1) * (lng2 - lng1) / (lat2 - lat1)
+            if longitude < crossing:
+                inside = not inside
+        previous = current
+    return inside
@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, FloatField, Max, Min, Value
+from django.db.models.functions import Cast, Floor, Greatest, Least
+from rest_framework.exceptions import ValidationError
+
+from apps.cache import generations, get_cache
+from apps.columnar import get_column_index, np
+from apps.models import Property
+
+HISTOGRAM_FIELDS = ('price', 'area')
+BUCKETS = 20
+
+
+def parse_histograms(value):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in HISTOGRAM_FIELDS]
+    if unknown:
+        raise ValidationError({'histogram': f"Unknown histogram fields: {', '.join(unknown)}. "
+                                            f"Available: {', '.join(HISTOGRAM_FIELDS)}"})
+    return list(dict.fromkeys(names))
+
+
+def cached(key, compute):
+    """``compute()`` cached until the next Property change."""
+    cache = get_cache()
+    key = f'hist:{generations([Property])[0]}:{key}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+    return value
+
+
+def bounds(field):
+    """Fixed ``(low, width)`` over all listings, so slider scales do not jump between filters."""
+    def compute():
+        values = Property.objects.aggregate(low=Min(field), high=Max(field))
+        low, high = float(values['low'] or 0), float(values['high'] or 0)
+        return low, max(high - low, 1.0) / BUCKETS
+    return cached(f'bounds:{field}', compute)
+
+
+def edges(field):
+    low, width = bounds(field)
+    return [round(low + width * index, 2) for index in range(BUCKETS + 1)]
+
+
+def bucket_expression(field):
+    low, width = bounds(field)
+    bucket = Floor((Cast(field, FloatField()) - Value(low)) / Value(width))
+    return Least(Greatest(bucket, Value(0.0)), Value(float(BUCKETS - 1)))
+
+
+def grouped_counts(queryset, field, by=None):
+    """Bucket counts in one grouped query; with ``by``, one histogram per value of that column."""
+    columns = [by, 'bucket'] if by else ['bucket']
+    rows = queryset.order_by().annotate(bucket=bucket_expression(field)).values(*columns).annotate(
+        count=Count('id', distinct=True))
+    histograms = defaultdict(lambda: [0] * BUCKETS)
+    for row in rows:
+        histograms[row[by] if by else None][int(row['bucket'])] = row['count']
+    return dict(histograms)
+
+
+def single_filter(filterset):
+    """``(column, value)`` when exactly one plain equality filter is active, '' for none, else None."""
+    active = [(name, value) for name, value in filterset.form.cleaned_data.items() if value not in (None, '', [])]
+    if not active:
+        return ''
+    if len(active) > 1:
+        return None
+    name, value = active[0]
+    declared = filterset.filters[name]
+    if declared.method is None and '__' not in declared.field_name and declared.lookup_expr == 'exact':
+        return declared.field_name, value
+    return None
+
+
+def histogram_counts(queryset, filterset, fields):
+    """
+    Unfiltered and single-equality-filter histograms come from per-generation tables that
+    cover every value of the filtered column at once; anything else is one vectorized pass
+    over the column index, or one grouped query.
+    """
+    histograms = {}
+    shape = single_filter(filterset) if filterset.is_valid() else None
+    index = get_column_index()
+    filters = index.filters_from(filterset) if index is not None and filterset.is_valid() else None
+    for field in fields:
+        if shape == '':
+            counts = cached(f'all:{field}', lambda: grouped_counts(Property.objects.all(), field)).get(None)
+        elif shape is not None:
+            column, value = shape
+            table = cached(f'by:{column}:{field}', lambda: grouped_counts(Property.objects.all(), field, column))
+            counts = table.get(value)
+        elif filters is not None:
+            counts = index_counts(index, filters, field)
+        else:
+            counts = grouped_counts(queryset, field).get(None)
+        histograms[field] = {'edges': edges(field), 'counts': counts or [0] * BUCKETS}
+    return histograms
+
+
+def index_counts(index, filters, field):
+    columns = index.refresh()
+    values = columns[field][index.mask(columns, filters)]
+    low, width = bounds(field)
+    buckets = np.clip(np.floor((values - low) / width), 0, BUCKETS - 1).astype(np.int64)
+    return np.bincount(buckets, minlength=BUCKETS).tolist()
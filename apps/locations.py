@@ -0,0 +1,93 @@
+import time
+
+from django.core.exceptions import FieldDoesNotExist
+
+# largest value a BigAutoField primary key can hold
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """``value`` as a primary key if it is a plain ASCII number in range, otherwise None."""
+    if not (value.isascii() and value.isdigit()):
+        return None
+    pk = int(value)
+    return pk if pk <= MAX_ID else None
+
+
+class LocationResolver:
+    """
+    Process-level maps from slug and name to primary key for small lookup tables
+    (locations, amenities), so filters can use plain FK lookups instead of joins.
+    Also holds the category tree for ancestry lookups.
+    """
+    ttl = 300
+
+    def __init__(self):
+        self.maps = {}
+        self.trees = {}
+
+    def get_map(self, model):
+        entry = self.maps.get(model)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1], entry[2]
+        try:
+            model._meta.get_field('slug')
+            rows = model._default_manager.values_list('id', 'slug', 'name')
+        except FieldDoesNotExist:
+            rows = ((pk, None, name) for pk, name in model._default_manager.values_list('id', 'name'))
+        slugs, names = {}, {}
+        for pk, slug, name in rows:
+            if slug:
+                slugs[slug] = pk
+            names.setdefault(name.casefold(), []).append(pk)
+        self.maps[model] = (time.monotonic(), slugs, names)
+        return slugs, names
+
+    def resolve(self, model, value):
+        """
+        Splits a comma-separated list of ids, slugs or exact (case-insensitive) names into
+        the primary keys it resolves to and the parts that matched nothing.
+        """
+        slugs, names = self.get_map(model)
+        ids, unresolved = [], []
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            pk = parse_id(part)
+            if pk is not None:
+                ids.append(pk)
+            elif part in slugs:
+                ids.append(slugs[part])
+            elif part.casefold() in names:
+                ids.extend(names[part.casefold()])
+            else:
+                unresolved.append(part)
+        return ids, unresolved
+
+    def get_tree(self, model):
+        entry = self.trees.get(model)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        tree = {pk: (parent_id, {'id': pk, 'name': name, 'slug': slug})
+                for pk, parent_id, name, slug in model._default_manager.values_list('id', 'parent_id', 'name', 'slug')}
+        self.trees[model] = (time.monotonic(), tree)
+        return tree
+
+    def ancestry(self, model, pk):
+        """Root-first ``{id, name, slug}`` chain from the top-level ancestor down to ``pk``."""
+        tree = self.get_tree(model)
+        path, seen = [], set()
+        while pk in tree and pk not in seen:
+            seen.add(pk)
+            parent_id, node = tree[pk]
+            path.append(node)
+            pk = parent_id
+        return path[::-1]
+
+    def invalidate(self, model):
+        self.maps.pop(model, None)
+        self.trees.pop(model, None)
+
+
+location_resolver = LocationResolver()
@@ -0,0 +1,98 @@
+import hashlib
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from apps.filters import SearchPropertyFilter
+from apps.models import Property, QueryShape
+from apps.pagination import PROPERTY_ORDERINGS
+
+MAX_INDEX_COLUMNS = 4
+TABLE = Property._meta.db_table
+PROBLEMS = {
+    # a SCAN walks the whole table, even when it walks it through an ordering index
+    'sqlite': (re.compile(rf'SCAN {TABLE}\b'), re.compile(r'USE TEMP B-TREE FOR ORDER BY')),
+    'postgresql': (re.compile(rf'Seq Scan on {TABLE}'), re.compile(r'Sort Key:')),
+}
+
+
+class Command(BaseCommand):
+    help = ("Replays the most expensive recorded search shapes with EXPLAIN and prints the composite indexes "
+            "to add to Property.Meta.indexes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help="Number of shapes to replay, by total latency.")
+        parser.add_argument('--min-hits', type=int, default=1)
+
+    def handle(self, *args, **options):
+        shapes = QueryShape.objects.filter(hits__gte=options['min_hits']).order_by('-total_ms')[:options['top']]
+        existing = self.existing_indexes()
+        proposals = {}
+        for shape in shapes:
+            filterset = SearchPropertyFilter(QueryDict(shape.sample), queryset=Property.objects.all())
+            if not filterset.is_valid():
+                continue
+            ordering = PROPERTY_ORDERINGS.get(shape.ordering, PROPERTY_ORDERINGS['newest'])
+            try:
+                plan = filterset.qs.order_by(*ordering)[:21].explain()
+            except ValidationError:
+                continue
+            problems = self.problems(plan)
+            avg = shape.total_ms / shape.hits if shape.hits else 0
+            self.stdout.write(f"[{shape.hits} hits, {avg:.1f} ms avg] filters={shape.filters or '-'} "
+                              f"ordering={shape.ordering or '-'}: {', '.join(problems) or 'ok'}")
+            if not problems:
+                continue
+            columns = self.propose(filterset, ordering)
+            if columns and not any(index[:len(columns)] == columns for index in existing):
+                proposals.setdefault(columns, []).append(shape)
+
+        if not proposals:
+            self.stdout.write("No new indexes to propose.")
+            return
+        indexes = [models.Index(fields=list(columns), name=self.index_name(columns)) for columns in proposals]
+        # the model is the source of truth for indexes, so makemigrations writes the migration
+        self.stdout.write("Add to Property.Meta.indexes, then run makemigrations:")
+        for index in indexes:
+            self.stdout.write(f"    models.Index(fields={index.fields!r}, name={index.name!r}),")
+
+    def problems(self, plan):
+        scan, sort = PROBLEMS.get(connection.vendor, PROBLEMS['postgresql'])
+        found = []
+        for line in plan.splitlines():
+            line = line.strip()
+            if scan.search(line) and 'scan' not in found:
+                found.append('scan')
+            elif sort.search(line) and 'sort' not in found:
+                found.append('sort')
+        return found
+
+    def propose(self, filterset, ordering):
+        """Equality columns first, then the leading ordering column."""
+        columns = []
+        for name, value in filterset.form.cleaned_data.items():
+            if value in (None, ''):
+                continue
+            declared = filterset.filters[name]
+            if declared.method == 'filter_location':
+                columns.append(name)
+            elif declared.method is None and '__' not in declared.field_name and declared.lookup_expr == 'exact':
+                columns.append(declared.field_name)
+        columns = list(dict.fromkeys(columns))
+        if ordering[0].lstrip('-') not in columns:
+            columns.append(ordering[0].lstrip('-'))
+        columns = tuple(columns[:MAX_INDEX_COLUMNS])
+        if len(columns) < 2:
+            return None
+        return columns
+
+    def existing_indexes(self):
+        indexes = [tuple(index.fields) for index in Property._meta.indexes]
+        indexes += [(field.name,) for field in Property._meta.concrete_fields if field.db_index or field.unique]
+        return indexes
+
+    def index_name(self, columns):
+        return 'apps_prop_%s_idx' % hashlib.md5(','.join(columns).encode()).hexdigest()[:10]
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from apps.market import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the MarketStat table from the active listings."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Wrote {rebuild()} market stat rows.")
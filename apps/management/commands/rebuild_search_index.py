@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.cache import bump_generation
+from apps.models import Property
+from apps.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the property full-text index from the table, e.g. after bulk updates or raw imports "
+            "that bypassed the save signals.")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        # cached search responses were built from the old index
+        bump_generation(Property)
+        self.stdout.write(f"Rebuilt the search index with {type(backend).__name__}.")
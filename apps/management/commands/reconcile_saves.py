@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from apps.counters import save_counter
+from apps.models import Property, Wishlist
+
+
+class Command(BaseCommand):
+    help = ("Recomputes Property.saves from Wishlist in chunks of properties and fixes drifted rows. "
+            "Safe to run periodically, e.g. from cron. Saves still buffered in running web processes "
+            "(at most VIEW_COUNTER_FLUSH_INTERVAL seconds' worth) are already in the Wishlist count and "
+            "get added once more when those processes flush; a later run corrects that.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        # only this process's buffer can be written first; see help for the others
+        save_counter.flush()
+        checked = fixed = 0
+        last = 0
+        while True:
+            rows = list(Property.objects.filter(pk__gt=last).order_by('pk')
+                        .values_list('pk', 'saves')[:options['chunk_size']])
+            if not rows:
+                break
+            last = rows[-1][0]
+            checked += len(rows)
+            actual = dict(Wishlist.objects.filter(property_id__in=[pk for pk, _ in rows]).order_by()
+                          .values_list('property_id').annotate(count=Count('id')))
+            drifted = [(pk, saves, actual.get(pk, 0)) for pk, saves in rows if saves != actual.get(pk, 0)]
+            if not drifted:
+                continue
+            for pk, saves, count in drifted:
+                self.stdout.write(f"Property {pk}: saves={saves}, wishlisted={count}")
+            if options['dry_run']:
+                fixed += len(drifted)
+                continue
+            with transaction.atomic():
+                for pk, saves, count in drifted:
+                    # skip rows a concurrent flush changed since they were read; the next run catches them
+                    fixed += Property.objects.filter(pk=pk, saves=saves).update(saves=count)
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(f"Checked {checked} properties, {verb} {fixed}.")
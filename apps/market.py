@@ -0,0 +1,172 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from apps.cache import bump_generation
+from apps.models import MarketStat, Property
+from apps.similarity import get_similarity_index, np
+
+DIMENSIONS = {
+    MarketStat.Dimension.DISTRICT: 'district_id',
+    MarketStat.Dimension.CITY: 'city_id',
+    MarketStat.Dimension.REGION: 'region_id',
+    MarketStat.Dimension.CATEGORY: 'category_id',
+}
+STATE_FIELDS = ('status', 'type', 'room', 'price', 'area') + tuple(DIMENSIONS.values())
+PERCENTILES = (0.25, 0.5, 0.75)
+
+
+def snapshot(instance):
+    """The fields of ``instance`` that feed the statistics."""
+    state = {name: getattr(instance, name) for name in STATE_FIELDS}
+    state['price'], state['area'] = Decimal(str(state['price'])), Decimal(str(state['area']))
+    return state
+
+
+def stored_state(pk):
+    return Property.objects.filter(pk=pk).values(*STATE_FIELDS).first()
+
+
+def groups(state):
+    if state is None or state['status'] != Property.Status.ACTIVE:
+        return []
+    return [dict(dimension=dimension, key=state[column], type=state['type'], room=state['room'])
+            for dimension, column in DIMENSIONS.items() if state[column] is not None]
+
+
+def apply(state, sign):
+    price, area = state['price'] * sign, state['area'] * sign
+    for group in groups(state):
+        changes = dict(count=F('count') + sign, total_price=F('total_price') + price,
+                       total_area=F('total_area') + area)
+        if MarketStat.objects.filter(**group).update(**changes) or sign < 0:
+            continue
+        _, created = MarketStat.objects.get_or_create(**group, defaults=dict(count=1, total_price=price,
+                                                                              total_area=area))
+        if not created:
+            MarketStat.objects.filter(**group).update(**changes)
+
+
+def record_change(old, new):
+    """Moves one property's contribution from ``old`` to ``new`` (either may be None)."""
+    if old == new:
+        return
+    with transaction.atomic():
+        if old is not None:
+            apply(old, -1)
+        if new is not None:
+            apply(new, 1)
+
+
+def rebuild():
+    """Recomputes every row from the active listings, one GROUP BY per dimension."""
+    stats = []
+    active = Property.objects.filter(status=Property.Status.ACTIVE).order_by()
+    for dimension, column in DIMENSIONS.items():
+        rows = active.filter(**{f'{column}__isnull': False}).values(column, 'type', 'room').annotate(
+            count=Count('id'), total_price=Sum('price'), total_area=Sum('area'),
+        )
+        stats += [MarketStat(dimension=dimension, key=row[column], type=row['type'], room=row['room'],
+                             count=row['count'], total_price=row['total_price'], total_area=row['total_area'])
+                  for row in rows]
+    with transaction.atomic():
+        MarketStat.objects.all().delete()
+        MarketStat.objects.bulk_create(stats, batch_size=1000)
+    bump_generation(MarketStat)
+    return len(stats)
+
+
+def interpolate(values, starts, counts, q):
+    position = starts + q * (counts - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def grouped_percentiles(codes, values):
+    """``{code: [p25, p50, p75]}`` for every group code, from one sort of all values."""
+    keep = ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+    if not len(codes):
+        return {}
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(codes)])
+    table = np.column_stack([interpolate(values, starts, counts, q) for q in PERCENTILES])
+    return dict(zip(codes[starts].tolist(), table.tolist()))
+
+
+def python_percentiles(values):
+    values = sorted(values)
+    result = []
+    for q in PERCENTILES:
+        position = q * (len(values) - 1)
+        low, high = int(position), min(int(position) + 1, len(values) - 1)
+        result.append(values[low] + (values[high] - values[low]) * (position - low))
+    return result
+
+
+def percentiles(dimension, keys=None, kind=None, room=None):
+    """
+    ``{(key, type): {'price': [...], 'price_per_m2': [...]}}`` over active listings, from the
+    similarity index columns when available, otherwise from one ORM read; either way grouped
+    and interpolated with one NumPy sort when NumPy is installed.
+    """
+    column = DIMENSIONS[dimension]
+    index = get_similarity_index()
+    if index is None:
+        return orm_percentiles(column, keys, kind, room)
+    columns = index.refresh()
+    type_codes = index.codes['type']
+    mask = columns['alive'] & (columns['status'] == index.codes['status'][Property.Status.ACTIVE]) & \
+        (columns[column] >= 0)
+    if keys:
+        mask &= np.isin(columns[column], keys)
+    if kind:
+        mask &= columns['type'] == type_codes.get(kind, -2)
+    if room is not None:
+        mask &= columns['room'] == room
+    return vector_percentiles(columns[column][mask], columns['type'][mask], type_codes, columns['price'][mask],
+                              columns['area'][mask])
+
+
+def vector_percentiles(keys, types, type_codes, price, area):
+    """Per ``(key, type)`` percentiles of aligned arrays; ``types`` holds the codes of ``type_codes``."""
+    codes = keys * len(type_codes) + types
+    per_m2 = np.divide(price, area, out=np.full(len(price), np.nan), where=area > 0)
+    by_price, by_m2 = grouped_percentiles(codes, price), grouped_percentiles(codes, per_m2)
+    names = {code: value for value, code in type_codes.items()}
+    return {(code // len(type_codes), names[code % len(type_codes)]): {'price': by_price[code],
+                                                                        'price_per_m2': by_m2.get(code)}
+            for code in by_price}
+
+
+def orm_percentiles(column, keys, kind, room):
+    queryset = Property.objects.filter(status=Property.Status.ACTIVE, **{f'{column}__isnull': False})
+    if keys:
+        queryset = queryset.filter(**{f'{column}__in': keys})
+    if kind:
+        queryset = queryset.filter(type=kind)
+    if room is not None:
+        queryset = queryset.filter(room=room)
+    rows = queryset.values_list(column, 'type', 'price', 'area').order_by()
+    if np is not None:
+        rows = list(rows)
+        if not rows:
+            return {}
+        group_keys, types, prices, areas = zip(*rows)
+        type_codes = {value: code for code, value in enumerate(sorted(set(types)))}
+        return vector_percentiles(np.array(group_keys, dtype=np.int64),
+                                  np.array([type_codes[value] for value in types], dtype=np.int64), type_codes,
+                                  np.array(prices, dtype=np.float64), np.array(areas, dtype=np.float64))
+    prices, per_m2 = defaultdict(list), defaultdict(list)
+    for key, listing_type, price, area in rows:
+        prices[key, listing_type].append(float(price))
+        if area:
+            per_m2[key, listing_type].append(float(price) / float(area))
+    return {group: {'price': python_percentiles(values),
+                    'price_per_m2': python_percentiles(per_m2[group]) if per_m2[group] else None}
+            for group, values in prices.items()}
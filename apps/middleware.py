@@ -0,0 +1,113 @@
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from apps.pagination import PROPERTY_ORDERINGS
+
+logger = logging.getLogger(__name__)
+
+
+class QueryShapeRecorder:
+    """
+    Aggregates request shapes (which filters and which ordering, not their values) in
+    memory and flushes them to ``QueryShape`` every ``interval`` seconds. Only the names
+    of ``SearchPropertyFilter`` filters and known orderings count, so clients cannot invent shapes.
+    """
+
+    def __init__(self, interval=30):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.buffer = {}
+        self.flushed_at = time.monotonic()
+
+    @cached_property
+    def filter_names(self):
+        from apps.filters import SearchPropertyFilter
+
+        return frozenset(SearchPropertyFilter.get_filters())
+
+    def shape(self, path, params):
+        filters = ','.join(sorted(name for name in params if name in self.filter_names and params.get(name)))
+        ordering = params.get('ordering', '')
+        if ordering not in PROPERTY_ORDERINGS:
+            ordering = ''
+        key = hashlib.md5(f'{path}|{filters}|{ordering}'.encode()).hexdigest()
+        return key, filters, ordering
+
+    def record(self, path, params, elapsed_ms):
+        key, filters, ordering = self.shape(path, params)
+        with self.lock:
+            entry = self.buffer.setdefault(key, {'path': path, 'filters': filters, 'ordering': ordering,
+                                                 'hits': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['hits'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['sample'] = params.urlencode()[:2000]
+            due = time.monotonic() - self.flushed_at >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        from apps.models import QueryShape
+
+        with self.lock:
+            buffer, self.buffer = self.buffer, {}
+            self.flushed_at = time.monotonic()
+        pending = list(buffer.items())
+        try:
+            while pending:
+                key, entry = pending[0]
+                shape, _ = QueryShape.objects.get_or_create(
+                    key=key, defaults={'path': entry['path'], 'filters': entry['filters'],
+                                       'ordering': entry['ordering']}
+                )
+                QueryShape.objects.filter(pk=shape.pk).update(
+                    hits=F('hits') + entry['hits'],
+                    total_ms=F('total_ms') + entry['total_ms'],
+                    max_ms=Greatest(F('max_ms'), entry['max_ms']),
+                    sample=entry['sample'],
+                    # update() skips auto_now
+                    last_seen=timezone.now(),
+                )
+                pending.pop(0)
+        except Exception:
+            # recording must never fail the request; keep the unwritten shapes for the next flush
+            logger.exception('Could not write query shapes')
+            self.restore(pending)
+
+    def restore(self, entries):
+        with self.lock:
+            for key, entry in entries:
+                current = self.buffer.get(key)
+                if current is None:
+                    self.buffer[key] = entry
+                    continue
+                current['hits'] += entry['hits']
+                current['total_ms'] += entry['total_ms']
+                current['max_ms'] = max(current['max_ms'], entry['max_ms'])
+
+
+shape_recorder = QueryShapeRecorder(getattr(settings, 'QUERY_SHAPE_FLUSH_INTERVAL', 30))
+
+
+class QueryShapeMiddleware:
+    """Records the filter/ordering shape and latency of search requests for ``manage.py index_advisor``."""
+    tracked_urls = {'search_property'}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        if request.method == 'GET' and match is not None and match.url_name in self.tracked_urls:
+            shape_recorder.record(request.path, request.GET, (time.perf_counter() - start) * 1000)
+        return response
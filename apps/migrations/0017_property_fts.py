@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS apps_property_fts USING fts5("
+        "name, address, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO apps_property_fts (rowid, name, address, description) "
+        "SELECT id, name, address, COALESCE(description, '') FROM apps_property"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS apps_property_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0016_property_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+from apps import geo
+
+
+def fill_geohash(apps, schema_editor):
+    Property = apps.get_model('apps', 'Property')
+    batch = []
+    located = Property.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for prop in located.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        prop.geohash = geo.encode(float(prop.latitude), float(prop.longitude))
+        batch.append(prop)
+        if len(batch) == 2000:
+            Property.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    Property.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0017_property_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
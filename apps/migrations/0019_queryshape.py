@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0018_property_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryShape',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, unique=True)),
+                ('path', models.CharField(max_length=255)),
+                ('filters', models.CharField(blank=True, max_length=1000)),
+                ('ordering', models.CharField(blank=True, max_length=50)),
+                ('sample', models.TextField(blank=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+from apps.amenities import amenity_bit
+
+
+def fill_amenity_mask(apps, schema_editor):
+    Property = apps.get_model('apps', 'Property')
+    masks = {}
+    for property_id, amenity_id in Property.amenities.through.objects.values_list('property_id', 'amenity_id'):
+        masks[property_id] = masks.get(property_id, 0) | amenity_bit(amenity_id)
+    by_mask = {}
+    for property_id, mask in masks.items():
+        by_mask.setdefault(mask, []).append(property_id)
+    for mask, ids in by_mask.items():
+        Property.objects.filter(pk__in=ids).update(amenity_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0019_queryshape'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_amenity_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0020_property_amenity_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('district', 'District'), ('city', 'City'), ('region', 'Region'), ('category', 'Category')], max_length=10)),
+                ('key', models.PositiveIntegerField()),
+                ('type', models.CharField(choices=[('sale', 'Sale'), ('rent', 'Rent')], max_length=10)),
+                ('room', models.PositiveIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=0, default=0, max_digits=20)),
+                ('total_area', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key', 'type', 'room'), name='apps_marketstat_group_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,275 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.http import Http404
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from apps.cache import generations, get_cache, normalized_query, record_metric
+from apps.columnar import get_column_index
+from apps.pagination import KeysetPagination
+
+
+def _walk(serializer, model, prefix, plan):
+    """Collects select/prefetch paths and loaded columns for ``serializer`` over ``model``."""
+    only = plan['only']
+    if only is not None:
+        only.add(prefix + model._meta.pk.name)
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            plan['only'] = only = None
+            continue
+
+        current, path = model, prefix
+        for attr in field.source_attrs[:-1]:
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or not (model_field.many_to_one or model_field.one_to_one) or \
+                    not model_field.concrete:
+                current = None
+                break
+            if only is not None:
+                only.add(path + attr)
+            path = path + attr + '__'
+            plan['select'].add(path[:-2])
+            current = model_field.related_model
+        if current is None:
+            plan['only'] = only = None
+            continue
+
+        name = field.source_attrs[-1]
+        try:
+            model_field = current._meta.get_field(name)
+        except FieldDoesNotExist:
+            plan['only'] = only = None
+            continue
+
+        if model_field.many_to_many or model_field.one_to_many:
+            child = field.child if isinstance(field, serializers.ListSerializer) else None
+            child_plan = {'select': set(), 'prefetch': [], 'only': set()}
+            if isinstance(child, serializers.BaseSerializer):
+                _walk(child, model_field.related_model, '', child_plan)
+            else:
+                child_plan['only'] = None
+            if model_field.one_to_many and child_plan['only'] is not None:
+                child_plan['only'].add(model_field.field.name)
+            plan['prefetch'].append((path + name, model_field.related_model, child_plan))
+        elif model_field.many_to_one or model_field.one_to_one:
+            if not model_field.concrete:
+                plan['only'] = only = None
+                continue
+            if only is not None:
+                only.add(path + name)
+            if isinstance(field, serializers.BaseSerializer):
+                plan['select'].add(path + name)
+                _walk(field, model_field.related_model, path + name + '__', plan)
+                only = plan['only']
+        elif model_field.concrete:
+            if only is not None:
+                only.add(path + name)
+        else:
+            plan['only'] = only = None
+
+
+@lru_cache(maxsize=256)
+def get_prefetch_plan(serializer_class, model, fieldset=None):
+    plan = {'select': set(), 'prefetch': [], 'only': set()}
+    _walk(serializer_class(context={'fieldset': fieldset}), model, '', plan)
+    return plan
+
+
+def apply_prefetch_plan(queryset, plan):
+    if plan['select']:
+        queryset = queryset.select_related(*sorted(plan['select']))
+    for path, model, child_plan in plan['prefetch']:
+        child_queryset = apply_prefetch_plan(model._default_manager.all(), child_plan)
+        queryset = queryset.prefetch_related(Prefetch(path, queryset=child_queryset))
+    if plan['only'] is not None:
+        queryset = queryset.only(*sorted(plan['only']))
+    return queryset
+
+
+def parse_fieldset(params):
+    """``(fields, expand)`` from the query string, sorted so equal selections share a prefetch plan."""
+    split = lambda name: tuple(sorted({part.strip() for part in params.get(name, '').split(',') if part.strip()}))
+    fields, expand = split('fields'), split('expand')
+    if not fields and not expand:
+        return None
+    return fields or None, expand
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for ``fields=`` and ``expand=``. ``fields`` replaces the rendered set,
+    ``expand`` adds fields outside ``default_fields`` (``None`` renders every declared field).
+    """
+    default_fields = None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = set(fields) if self.default_fields is None else set(self.default_fields)
+        fieldset = self.context.get('fieldset')
+        if fieldset:
+            requested, expand = fieldset
+            unknown = sorted((set(requested or ()) | set(expand)) - set(fields))
+            if unknown:
+                raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+            selected = set(requested) if requested else selected | set(expand)
+        return {name: field for name, field in fields.items() if name in selected}
+
+
+class SerializerPrefetchMixin:
+    """
+    Loads exactly what the serializer renders: forward relations are joined, reverse
+    and many-to-many ones are prefetched in one query each, and unused columns are
+    left out. The plan is derived once per serializer class and fieldset.
+    """
+
+    def get_fieldset(self):
+        request = getattr(self, 'request', None)
+        return parse_fieldset(request.query_params) if request is not None else None
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'fieldset': self.get_fieldset()}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        plan = get_prefetch_plan(self.get_serializer_class(), queryset.model, self.get_fieldset())
+        return apply_prefetch_plan(queryset, plan)
+
+
+class ColumnIndexMixin:
+    """
+    Answers keyset-paginated list requests from the in-memory column index when every
+    active filter is a plain column comparison; the database only loads the page by id.
+    """
+
+    def paginate_queryset(self, queryset):
+        page = self.paginate_from_index(queryset)
+        if page is None:
+            page = super().paginate_queryset(queryset)
+        return page
+
+    def paginate_from_index(self, queryset):
+        index = get_column_index()
+        paginator = self.paginator
+        if index is None or not isinstance(paginator, KeysetPagination):
+            return None
+        filterset = self.filterset_class(self.request.query_params, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            return None
+        filters = index.filters_from(filterset)
+        if filters is None:
+            return None
+        paginator.prepare(self.request, self, queryset)
+        fields = paginator.reversed_fields() if paginator.reverse else paginator.fields
+        result = index.query(filters, fields, paginator.position, paginator.page_size + 1)
+        if result is None:
+            return None
+        ids, count = result
+        if paginator.count_mode != 'none':
+            paginator.count, paginator.count_type = count, 'exact'
+        rows = paginator.ensure_loaded(queryset).filter(pk__in=ids).order_by()
+        rows = {row.pk: row for row in rows}
+        return paginator.finish([rows[pk] for pk in ids if pk in rows])
+
+
+class CachedResponseMixin:
+    """
+    Caches GET responses under the normalized query string plus the generation of every
+    model in ``cache_models``. Saving or deleting any of those models bumps its generation,
+    which retires all old entries at once.
+    """
+    cache_models = ()
+    cache_timeout = None
+
+    def get_cache_key(self, request):
+        versions = '.'.join(str(version) for version in generations(self.cache_models))
+        digest = hashlib.md5(f'{versions}|{request.get_host()}?{normalized_query(request)}'.encode()).hexdigest()
+        return f'resp:{type(self).__name__}:{digest}'
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record_metric('hits')
+            return Response(data, headers={'X-Cache': 'HIT'})
+        record_metric('misses')
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+            cache.set(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalDetailMixin:
+    """
+    Detail GETs validated by ``updated_at``: the version is read with a single-column
+    lookup, the serialized body is cached per version and fieldset, and a matching
+    ``If-None-Match`` or ``If-Modified-Since`` returns 304 without serializing.
+    The ETag is a hash of the cached body, so it is strong. Bodies that also render
+    ``cache_models`` are keyed on their generations and validated by ETag only.
+    ``volatile_fields`` (counters written without moving the version) are read with the
+    version, left out of the ETag and filled in fresh on every response.
+    """
+    version_field = 'updated_at'
+    volatile_fields = ()
+    cache_models = ()
+
+    def get_version(self, **kwargs):
+        """``(version, {volatile field: current value})``."""
+        lookup = {self.lookup_field: kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        row = self.get_queryset().filter(**lookup).values_list(self.version_field, *self.volatile_fields).first()
+        if row is None:
+            raise Http404
+        return row[0], dict(zip(self.volatile_fields, row[1:]))
+
+    def get(self, request, *args, **kwargs):
+        version, volatile = self.get_version(**kwargs)
+        cache = get_cache()
+        generation = '.'.join(str(value) for value in generations(self.cache_models))
+        variant = hashlib.md5(f'{request.get_host()}|{self.get_fieldset()}|{generation}'.encode()).hexdigest()
+        key = f'detail:{type(self).__name__}:{kwargs[self.lookup_url_kwarg or self.lookup_field]}:' \
+              f'{version.timestamp()}:{variant}'
+        entry = cache.get(key)
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            data = {name: value for name, value in response.data.items() if name not in self.volatile_fields}
+            body = json.dumps(data, sort_keys=True, default=str)
+            entry = {'etag': '"%s"' % hashlib.md5(body.encode()).hexdigest(), 'data': response.data}
+            cache.set(key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+        if self.not_modified(request, entry['etag'], version):
+            response = Response(status=304)
+        else:
+            data = dict(entry['data'])
+            data.update({name: value for name, value in volatile.items() if name in data})
+            response = Response(data)
+        response['ETag'] = entry['etag']
+        if not self.cache_models:
+            response['Last-Modified'] = http_date(version.timestamp())
+        return response
+
+    def not_modified(self, request, etag, version):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return etag in tags or '*' in tags
+        if self.cache_models:
+            return False
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return since is not None and int(version.timestamp()) <= since
@@ -4,6 +4,8 @@ from django.db import models
 from django.db.models import CASCADE
 from django.utils.text import slugify
 
+from apps import geo
+
 
 class UserManager(BaseUserManager):
     def create_user(self, phone_number, password=None, **extra_fields):
@@ -96,6 +98,7 @@ class Property(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=0)
     description = models.TextField(null=True, blank=True)
     amenities = models.ManyToManyField('apps.Amenity', related_name='properties', blank=True)
+    amenity_mask = models.BigIntegerField(default=0, editable=False)
     type = models.CharField(max_length=10, choices=Type.choices)
     category = models.ForeignKey('apps.Category', on_delete=models.CASCADE, related_name='properties')
     label = models.CharField(max_length=10, choices=Label.choices, null=True, blank=True)
@@ -120,15 +123,34 @@ class Property(models.Model):
 
     latitude = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
 
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.ACTIVE)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    managed_fields = ('amenity_mask', 'views', 'saves')
+
     class Meta:
         verbose_name = "Property"
         verbose_name_plural = "Properties"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='apps_prop_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='apps_prop_price_id_idx'),
+            models.Index(fields=['views', 'id'], name='apps_prop_views_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(float(self.latitude), float(self.longitude))
+        else:
+            self.geohash = ''
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # amenity_mask and the counters are written elsewhere; a stale copy must not overwrite them
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.managed_fields]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -346,3 +368,44 @@ class District(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class QueryShape(models.Model):
+    key = models.CharField(max_length=32, unique=True)
+    path = models.CharField(max_length=255)
+    filters = models.CharField(max_length=1000, blank=True)
+    ordering = models.CharField(max_length=50, blank=True)
+    sample = models.TextField(blank=True)
+    hits = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.path} [{self.filters}] {self.ordering}"
+
+
+class MarketStat(models.Model):
+    """Running totals of active listings per location or category, type and room count."""
+
+    class Dimension(models.TextChoices):
+        DISTRICT = 'district', 'District'
+        CITY = 'city', 'City'
+        REGION = 'region', 'Region'
+        CATEGORY = 'category', 'Category'
+
+    dimension = models.CharField(max_length=10, choices=Dimension.choices)
+    key = models.PositiveIntegerField()
+    type = models.CharField(max_length=10, choices=Property.Type.choices)
+    room = models.PositiveIntegerField()
+    count = models.IntegerField(default=0)
+    total_price = models.DecimalField(max_digits=20, decimal_places=0, default=0)
+    total_area = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key', 'type', 'room'], name='apps_marketstat_group_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} {self.key} {self.type} {self.room} rooms: {self.count}"
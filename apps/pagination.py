@@ -0,0 +1,345 @@
+import base64
+import binascii
+import hashlib
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from apps.cache import get_cache
+
+PROPERTY_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'highest_price': ('-price', '-id'),
+    'lowest_price': ('price', 'id'),
+    'popular': ('-views', '-id'),
+    'less_viewed': ('views', 'id'),
+}
+
+CREATED_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+}
+
+COUNT_MODES = ('auto', 'exact', 'estimate', 'none')
+
+
+def estimate_count(queryset):
+    """
+    ``(count, count_type)`` without an exact scan: the planner's row estimate on PostgreSQL,
+    elsewhere an exact count cached for ``PAGINATION_COUNT_CACHE_TIMEOUT`` seconds.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows']), 'estimate'
+    sql, params = queryset.query.sql_with_params()
+    key = 'count:%s' % hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    cache = get_cache()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60))
+    return count, 'cached'
+
+
+def bounded_count(queryset):
+    """Exact ``(count, 'exact')`` up to ``PAGINATION_EXACT_COUNT_LIMIT`` rows, ``estimate_count`` beyond."""
+    queryset = queryset.order_by()
+    limit = getattr(settings, 'PAGINATION_EXACT_COUNT_LIMIT', 1000)
+    count = queryset.values('pk')[:limit + 1].count()
+    if count <= limit:
+        return count, 'exact'
+    estimate, count_type = estimate_count(queryset)
+    return max(estimate, limit + 1), count_type
+
+
+def parse_limit(value, default, maximum):
+    """A ``limit``-style query parameter clamped to ``[1, maximum]``; ``default`` when missing or not a number."""
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        return default
+    return min(max(limit, 1), maximum)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin changelist paginator that never runs an unbounded COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        return bounded_count(self.object_list)[0]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the whole ordering tuple, e.g. ``(price, id)``, so deep
+    pages are an index range scan instead of an OFFSET. Views choose their orderings
+    with ``cursor_orderings`` and ``cursor_default_ordering``.
+
+    ``count=`` picks how the total is reported: ``exact``, ``estimate``, ``none`` (only
+    ``has_more``) or ``auto``, which counts exactly up to ``PAGINATION_EXACT_COUNT_LIMIT``
+    rows and estimates beyond that.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+    default_count_mode = 'auto'
+    orderings = {
+        'newest': ('-id',),
+        'oldest': ('id',),
+    }
+    default_ordering = 'newest'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.prepare(request, view, queryset)
+        self.count, self.count_type = self.get_count(queryset)
+        queryset = self.ensure_loaded(queryset)
+        fields = self.reversed_fields() if self.reverse else self.fields
+        queryset = queryset.order_by(*fields)
+        if self.position is not None:
+            queryset = queryset.filter(self.position_filter(fields, self.position))
+        return self.finish(list(queryset[:self.page_size + 1]))
+
+    def prepare(self, request, view=None, queryset=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering_name = self.get_ordering(request, view, queryset)
+        self.fields = self.get_orderings(view)[self.ordering_name]
+        self.position, self.reverse = self.decode_cursor(request)
+        if self.position is not None and queryset is not None:
+            self.position = self.clean_position(queryset, self.position)
+        self.count_mode = self.get_count_mode(request, view)
+        self.count, self.count_type = None, 'none'
+        self.has_next = self.has_previous = False
+        self.next_position = self.previous_position = None
+
+    def finish(self, rows):
+        has_extra = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_extra
+        else:
+            self.has_next, self.has_previous = has_extra, self.position is not None
+        if rows:
+            self.next_position = self.row_position(rows[-1])
+            self.previous_position = self.row_position(rows[0])
+        else:
+            self.has_next = self.has_previous = False
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'count_type': self.count_type,
+            'has_more': self.has_next,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'count_type': {'type': 'string', 'enum': ['exact', 'estimate', 'cached', 'none']},
+                'has_more': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'How to count the results: auto (exact for small sets, estimated otherwise), '
+                               'exact, estimate, or none to only report has_more.',
+                'schema': {'type': 'string', 'enum': list(COUNT_MODES)},
+            },
+        ]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_count_mode(self, request, view=None):
+        mode = request.query_params.get(self.count_query_param)
+        if mode not in COUNT_MODES:
+            return getattr(view, 'cursor_count_mode', self.default_count_mode)
+        return mode
+
+    def get_count(self, queryset):
+        if self.count_mode == 'none':
+            return None, 'none'
+        queryset = queryset.order_by()
+        if self.count_mode == 'exact':
+            return queryset.count(), 'exact'
+        if self.count_mode == 'auto':
+            return bounded_count(queryset)
+        return estimate_count(queryset)
+
+    def get_orderings(self, view):
+        return getattr(view, 'cursor_orderings', self.orderings)
+
+    def get_ordering(self, request, view=None, queryset=None):
+        orderings = self.get_orderings(view)
+        default = getattr(view, 'cursor_default_ordering', self.default_ordering)
+        name = request.query_params.get(self.ordering_query_param)
+        if name not in orderings:
+            return default
+        if queryset is not None and not self.is_orderable(queryset, orderings[name]):
+            return default
+        return name
+
+    def is_orderable(self, queryset, fields):
+        for field in fields:
+            name = field.lstrip('-').split('__')[0]
+            if name in queryset.query.annotations:
+                continue
+            try:
+                queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+        return True
+
+    def ensure_loaded(self, queryset):
+        # Rows are read back to build the next cursor, so the ordering columns
+        # must survive any only() the view applied.
+        immediate, defer = queryset.query.deferred_loading
+        if defer or not immediate:
+            return queryset
+        names = [field.lstrip('-') for field in self.fields]
+        missing = [name for name in names if name not in immediate and name != 'id' and
+                   name.split('__')[0] not in queryset.query.annotations]
+        if not missing:
+            return queryset
+        return queryset.only(*immediate, *missing)
+
+    def reversed_fields(self):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in self.fields)
+
+    def position_filter(self, fields, values):
+        condition = Q()
+        for index, field in enumerate(fields):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, value in zip(fields[:index], values):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def row_position(self, row):
+        values = []
+        for field in self.fields:
+            value = row
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            values.append(self.encode_value(value))
+        return values
+
+    def encode_value(self, value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            ordering, values, reverse = payload['o'], payload['v'], bool(payload.get('r'))
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering_name or not isinstance(values, list) or len(values) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def ordering_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        model, parts = queryset.model, name.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(parts[-1])
+
+    def clean_position(self, queryset, values):
+        """The cursor values converted and validated by the fields they order, or NotFound."""
+        position = []
+        for field, value in zip(self.fields, values):
+            if value is None or isinstance(value, float) and not math.isfinite(value):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                value = self.ordering_field(queryset, field.lstrip('-')).clean(value, None)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if isinstance(value, datetime) and settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            position.append(value)
+        return position
+
+    def encode_cursor(self, values, reverse=False):
+        payload = {'o': self.ordering_name, 'v': values}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
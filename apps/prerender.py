@@ -0,0 +1,152 @@
+import gzip
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from apps.cache import generations, get_cache
+from apps.models import Blog, StaticPage
+from apps.Serializers.home_page_serializers import BlogSerializer, StaticPageSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# keyed by the URL name of the list endpoint
+PAGES = {
+    'blogs': (Blog, BlogSerializer),
+    'static_pages': (StaticPage, StaticPageSerializer),
+}
+# preferred first when the client accepts several
+ENCODINGS = ('br', 'gzip', 'deflate')
+
+
+def compress(body):
+    encoded = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(body)
+    else:
+        encoded['deflate'] = zlib.compress(body, 9)
+    return encoded
+
+
+class OriginRequest(HttpRequest):
+    """A bare GET of ``path`` on ``scheme://host``, to render absolute URLs outside a request."""
+
+    def __init__(self, origin, path):
+        super().__init__()
+        self.origin_scheme, _, host = origin.partition('://')
+        self.method = 'GET'
+        self.path = self.path_info = path
+        self.META = {'HTTP_HOST': host}
+
+    def _get_scheme(self):
+        return self.origin_scheme
+
+
+def origin(request):
+    return f'{request.scheme}://{request.get_host()}'
+
+
+def render(name, request, slug=None):
+    """
+    The JSON the list endpoint returns for its first page (envelope included), or the row with
+    ``slug`` (None if there is none), in every encoding. URLs are absolute to ``request``'s host.
+    """
+    model, serializer_class = PAGES[name]
+    context = {'request': request}
+    if slug is None:
+        paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        page = paginator.paginate_queryset(model.objects.all(), request)
+        data = paginator.get_paginated_response(serializer_class(page, many=True, context=context).data).data
+    else:
+        row = model.objects.filter(slug=slug).first()
+        if row is None:
+            return None
+        data = serializer_class(row, context=context).data
+    body = JSONRenderer().render(data)
+    return {'digest': hashlib.md5(body).hexdigest(), 'bodies': compress(body)}
+
+
+def get_rendered(name, request, slug=None):
+    """
+    Rendered bytes from the response cache, per origin and under the current generation of the
+    model so any save retires them; rendered on a miss. Origins are remembered for ``regenerate``.
+    """
+    model = PAGES[name][0]
+    key = f'rendered:{name}:{generations([model])[0]}:{origin(request)}:{slug or ""}'
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is None:
+        entry = render(name, request, slug)
+        if entry is not None:
+            timeout = getattr(settings, 'PRERENDER_TIMEOUT', 86400)
+            cache.set(key, entry, timeout)
+            origins = cache.get('rendered:origins', [])
+            if origin(request) not in origins:
+                cache.set('rendered:origins', [*origins, origin(request)], timeout)
+    return entry
+
+
+def choose_encoding(header, available):
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            param_name, _, value = param.strip().partition('=')
+            if param_name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in ENCODINGS:
+        if coding in available and accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return 'identity'
+
+
+def prerendered_response(request, entry):
+    """Serves ``entry`` in the best encoding the client accepts, or 304 when its ETag still matches."""
+    coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), entry['bodies'])
+    etag = f'"{entry["digest"]}"' if coding == 'identity' else f'"{entry["digest"]}-{coding}"'
+    matches = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if '*' in matches or etag in matches or f'W/{etag}' in matches:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['bodies'][coding], content_type='application/json')
+        if coding != 'identity':
+            response['Content-Encoding'] = coding
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
+
+class PrerenderedListMixin:
+    """
+    Serves the first page of a list view, when the query string is empty, from the bytes
+    ``get_rendered`` stores under ``prerendered``; any other page goes through the view.
+    """
+    prerendered = None
+
+    def get(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().get(request, *args, **kwargs)
+        return prerendered_response(request, get_rendered(self.prerendered, request))
+
+
+def regenerate(name, slug=None):
+    """Renders the list, and the row with ``slug``, again for every origin served so far."""
+    path = reverse(name)
+    for served in get_cache().get('rendered:origins', []):
+        get_rendered(name, Request(OriginRequest(served, path)))
+        if slug:
+            get_rendered(name, Request(OriginRequest(served, path)), slug)
@@ -0,0 +1,120 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from apps.models import Property
+
+RANK_ANNOTATION = 'search_rank'
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text.lower())
+
+
+class SearchBackend:
+    """
+    Full-text search over property name, address and description.
+
+    ``search`` filters a queryset to the matching rows and annotates ``search_rank``,
+    where a lower rank is a better match.
+    """
+
+    def index(self, instance):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, queryset, text):
+        raise NotImplementedError
+
+
+class SqliteFTSBackend(SearchBackend):
+    table = 'apps_property_fts'
+    # bm25 column weights: name, address, description
+    weights = (10.0, 4.0, 1.0)
+
+    def match_expression(self, text):
+        # Every token must match; the trailing * keeps results coming while the user types.
+        return ' '.join(f'"{token}"*' for token in tokenize(text))
+
+    def index(self, instance):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name, address, description) VALUES (%s, %s, %s, %s)',
+                [instance.pk, instance.name, instance.address, instance.description or ''],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name, address, description) '
+                f'SELECT id, name, address, COALESCE(description, \'\') FROM {Property._meta.db_table}'
+            )
+
+    def search(self, queryset, text):
+        match = self.match_expression(text)
+        if not match:
+            return queryset.none()
+        weights = ', '.join(str(weight) for weight in self.weights)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        ).annotate(**{RANK_ANNOTATION: RawSQL(
+            f'SELECT bm25({self.table}, {weights}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = {Property._meta.db_table}.id',
+            [match], output_field=FloatField(),
+        )})
+
+
+class PostgresSearchBackend(SearchBackend):
+    def search(self, queryset, text):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        if not tokenize(text):
+            return queryset.none()
+        vector = (SearchVector('name', weight='A') + SearchVector('address', weight='B') +
+                  SearchVector('description', weight='C'))
+        query = SearchQuery(text, search_type='websearch')
+        return queryset.annotate(search_vector=vector).filter(search_vector=query).annotate(
+            **{RANK_ANNOTATION: SearchRank(vector, query) * Value(-1.0)}
+        )
+
+
+class IcontainsSearchBackend(SearchBackend):
+    def search(self, queryset, text):
+        tokens = tokenize(text)
+        if not tokens:
+            return queryset.none()
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(name__icontains=token) | Q(address__icontains=token) | Q(description__icontains=token)
+            )
+        return queryset.annotate(**{RANK_ANNOTATION: Value(0.0, output_field=FloatField())})
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SqliteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, 'PROPERTY_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return VENDOR_BACKENDS.get(connection.vendor, IcontainsSearchBackend)()
@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.amenities import clear_amenity_bit, refresh_amenity_masks
+from apps.cache import bump_generation
+from apps.columnar import column_index
+from apps.counters import save_counter
+from apps.locations import location_resolver
+from apps.market import record_change, snapshot, stored_state
+from apps.prerender import regenerate
+from apps.models import (Property, Amenity, Country, Region, City, District, Metro, Image, Category,
+                         ResidentialComplex, Blog, Wishlist, Video, Tariff, StaticPage)
+from apps.search import get_search_backend
+from apps.similarity import similarity_index
+from apps.vip import vip_feed
+
+
+@receiver(post_save, sender=Property)
+def index_property(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Property)
+def unindex_property(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+    column_index.discard(instance.pk)
+    similarity_index.discard(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=Region)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=District)
+@receiver([post_save, post_delete], sender=Metro)
+@receiver([post_save, post_delete], sender=Amenity)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ResidentialComplex)
+def invalidate_resolver(sender, **kwargs):
+    location_resolver.invalidate(sender)
+
+
+@receiver(m2m_changed, sender=Property.amenities.through)
+def sync_amenity_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._cleared_property_ids = list(instance.properties.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.amenity_mask = refresh_amenity_masks([instance.pk])[instance.pk]
+    elif action == 'post_clear':
+        refresh_amenity_masks(instance.__dict__.pop('_cleared_property_ids', []))
+    else:
+        refresh_amenity_masks(pk_set)
+    bump_generation(Property)
+
+
+@receiver(post_delete, sender=Amenity)
+def drop_amenity_bit(sender, instance, **kwargs):
+    clear_amenity_bit(instance.pk)
+
+
+def touch_properties(ids):
+    """Moves ``updated_at`` of properties whose nested media or amenities changed, so detail ETags change."""
+    Property.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Image)
+@receiver([post_save, post_delete], sender=Video)
+def touch_media_property(sender, instance, **kwargs):
+    touch_properties([instance.property_id])
+
+
+@receiver(pre_delete, sender=Amenity)
+def remember_amenity_properties(sender, instance, **kwargs):
+    instance._property_ids = list(instance.properties.values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Amenity)
+def touch_amenity_properties(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    if hasattr(instance, '_property_ids'):
+        touch_properties(instance.__dict__.pop('_property_ids'))
+    else:
+        touch_properties(instance.properties.values('id'))
+
+
+@receiver([post_save, post_delete], sender=Property)
+@receiver([post_save, post_delete], sender=Image)
+@receiver([post_save, post_delete], sender=Amenity)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ResidentialComplex)
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=Region)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=District)
+@receiver([post_save, post_delete], sender=Metro)
+@receiver([post_save, post_delete], sender=Blog)
+@receiver([post_save, post_delete], sender=Video)
+@receiver([post_save, post_delete], sender=StaticPage)
+def bump_cache_generation(sender, **kwargs):
+    bump_generation(sender)
+
+
+@receiver(post_save, sender=Wishlist)
+def count_save(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: save_counter.increment(instance.property_id))
+
+
+@receiver(post_delete, sender=Wishlist)
+def count_unsave(sender, instance, **kwargs):
+    transaction.on_commit(lambda: save_counter.increment(instance.property_id, -1))
+
+
+@receiver(pre_save, sender=Property)
+def remember_market_state(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None and not instance._state.adding:
+        instance._market_state = stored_state(instance.pk)
+
+
+@receiver(post_save, sender=Property)
+def update_market_stats(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(instance.__dict__.pop('_market_state', None), snapshot(instance))
+
+
+@receiver(post_delete, sender=Property)
+def remove_market_stats(sender, instance, **kwargs):
+    record_change(snapshot(instance), None)
+
+
+@receiver([post_save, post_delete], sender=Property)
+def refresh_vip_feed(sender, instance, **kwargs):
+    if vip_feed.touches(instance):
+        vip_feed.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Tariff)
+def refresh_vip_weights(sender, **kwargs):
+    vip_feed.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Blog)
+@receiver([post_save, post_delete], sender=StaticPage)
+def rerender_pages(sender, instance, **kwargs):
+    name = 'blogs' if sender is Blog else 'static_pages'
+    slug = instance.slug if kwargs.get('signal') is post_save else None
+    transaction.on_commit(lambda: regenerate(name, slug))
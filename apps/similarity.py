@@ -0,0 +1,140 @@
+import math
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Abs
+
+from apps.columnar import PropertyColumnIndex, np
+from apps.models import Property
+
+# relative weight of each term in the squared distance
+WEIGHTS = {
+    'price': 1.0,
+    'area': 1.0,
+    'price_per_m2': 1.0,
+    'room': 0.5,
+    'floor': 0.25,
+    'location': 1.0,
+    'category_id': 1.0,
+    'city_id': 2.0,
+    'district_id': 0.5,
+    'building_material': 0.25,
+    'renovation_needed': 0.25,
+    'repair': 0.25,
+}
+# distance at which the location term reaches 1
+LOCATION_SCALE_KM = 5.0
+
+
+class SimilarityIndex(PropertyColumnIndex):
+    """
+    The column index with the extra columns similarity needs. Standardized features and
+    per-city row buckets are derived once per published set of columns and reused by every query.
+    """
+    numeric_fields = ('price', 'area', 'room', 'floor', 'latitude', 'longitude')
+    enum_fields = ('type', 'building_material', 'renovation_needed', 'repair', 'status')
+    time_fields = ()
+    key_fields = ('category_id', 'city_id', 'district_id', 'region_id')
+
+    def reset(self):
+        super().reset()
+        self.derived = None
+
+    @property
+    def fields(self):
+        return self.numeric_fields + self.enum_fields + self.key_fields
+
+    def encode_column(self, name, values):
+        if name in self.key_fields:
+            return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+        if name in self.numeric_fields:
+            return np.array([math.nan if value is None else float(value) for value in values], dtype=np.float64)
+        return super().encode_column(name, values)
+
+    def derive(self, columns):
+        if self.derived is not None and self.derived[0] is columns:
+            return self.derived[1]
+        area = np.where(columns['area'] > 0, columns['area'], np.nan)
+        raw = {
+            'price': np.log1p(columns['price']),
+            'area': np.log1p(columns['area']),
+            'price_per_m2': np.log1p(columns['price'] / area),
+            'room': columns['room'],
+            'floor': columns['floor'],
+        }
+        features = {}
+        for name, values in raw.items():
+            std = np.nanstd(values)
+            features[name] = (values - np.nanmean(values)) / (std if std > 0 else 1.0)
+        features['lat'] = np.radians(columns['latitude'])
+        features['lng'] = np.radians(columns['longitude'])
+        order = np.argsort(columns['city_id'], kind='stable')
+        cities, starts = np.unique(columns['city_id'][order], return_index=True)
+        buckets = dict(zip(cities.tolist(), np.split(order, starts[1:])))
+        derived = {'features': features, 'buckets': buckets}
+        self.derived = (columns, derived)
+        return derived
+
+    def similar(self, pk, limit=10):
+        """Ids of the ``limit`` active properties closest to ``pk``, same type, nearest first, or None."""
+        columns = self.refresh()
+        ids = columns['id']
+        position = np.searchsorted(ids, pk)
+        if position >= len(ids) or ids[position] != pk or not columns['alive'][position]:
+            return None
+        derived = self.derive(columns)
+        candidates = self.candidates(columns, derived['buckets'].get(int(columns['city_id'][position])), position)
+        if len(candidates) < limit:
+            candidates = self.candidates(columns, None, position)
+        if not len(candidates):
+            return []
+        distance = self.distances(columns, derived['features'], position, candidates)
+        if len(candidates) > limit:
+            nearest = np.argpartition(distance, limit - 1)[:limit]
+            candidates, distance = candidates[nearest], distance[nearest]
+        order = np.lexsort((ids[candidates], distance))
+        return ids[candidates[order]].tolist()
+
+    def candidates(self, columns, rows, position):
+        if rows is None:
+            rows = np.arange(len(columns['id']))
+        keep = columns['alive'][rows] & (columns['status'][rows] == self.codes['status'][Property.Status.ACTIVE]) & \
+            (columns['type'][rows] == columns['type'][position]) & (rows != position)
+        return rows[keep]
+
+    def distances(self, columns, features, position, rows):
+        total = np.zeros(len(rows))
+        for name in ('price', 'area', 'price_per_m2', 'room', 'floor'):
+            values = features[name]
+            # a missing value on either side counts as one standard deviation apart
+            total += WEIGHTS[name] * np.nan_to_num((values[rows] - values[position]) ** 2, nan=1.0)
+        lat, lng = features['lat'], features['lng']
+        # equirectangular approximation, accurate to well under 1% at city scale
+        x = (lng[rows] - lng[position]) * np.cos((lat[rows] + lat[position]) / 2)
+        km = np.hypot(x, lat[rows] - lat[position]) * 6371.0
+        total += WEIGHTS['location'] * np.nan_to_num(np.minimum(km / LOCATION_SCALE_KM, 3.0) ** 2, nan=1.0)
+        for name in ('category_id', 'city_id', 'district_id', 'building_material', 'renovation_needed', 'repair'):
+            total += WEIGHTS[name] * (columns[name][rows] != columns[name][position])
+        return total
+
+
+similarity_index = SimilarityIndex(getattr(settings, 'PROPERTY_COLUMN_INDEX_REFRESH', 5))
+
+
+def get_similarity_index():
+    if np is None or not getattr(settings, 'PROPERTY_SIMILARITY_INDEX', False):
+        return None
+    return similarity_index
+
+
+def similar_property_ids(property, limit=10):
+    """``similarity_index`` when enabled; otherwise the closest prices of the same type, city and category."""
+    index = get_similarity_index()
+    if index is not None:
+        ids = index.similar(property.pk, limit)
+        if ids is not None:
+            return ids
+    queryset = Property.objects.filter(
+        status=Property.Status.ACTIVE, type=property.type, city_id=property.city_id, category_id=property.category_id,
+    ).exclude(pk=property.pk)
+    return list(queryset.order_by(Abs(F('price') - property.price), 'id').values_list('id', flat=True)[:limit])
@@ -24,13 +24,25 @@ urlpatterns += [
 
 urlpatterns += [
     path('search/', SearchProperty.as_view(), name='search_property'),
+    path('property/', PropertyBulkView.as_view(), name='property_bulk'),
     path('property/<int:pk>', PropertyView.as_view(), name='property'),
+    path('property/<int:pk>/similar', SimilarPropertyView.as_view(), name='similar_property'),
+    path('property/<int:pk>/bundle', PropertyBundleView.as_view(), name='property_bundle'),
+    path('property/<int:pk>/videos', PropertyVideoView.as_view(), name='property_videos'),
 ]
 
 urlpatterns += [
+    path('home/', HomeView.as_view(), name='home'),
     path('vip/properties', VipPropertyView.as_view(), name='vip_property'),
     path('residential/complex/', ResidentialComplexView.as_view(), name='residential_complex'),
     path('videos/', VideoView.as_view(), name='videos'),
     path('blogs/', BlogView.as_view(), name='blogs'),
+    path('blogs/<slug:slug>/', BlogDetailView.as_view(), name='blog_detail'),
     path('static/pages', StaticPageView.as_view(), name='static_pages'),
+    path('static/pages/<slug:slug>', StaticPageDetailView.as_view(), name='static_page_detail'),
+]
+
+urlpatterns += [
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='cache_stats'),
+    path('stats/market/', MarketStatsView.as_view(), name='market_stats'),
 ]
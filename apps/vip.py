@@ -0,0 +1,86 @@
+import heapq
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.models import Property, Tariff
+
+FEED_LABELS = (Property.Label.VIP, Property.Label.PREMIUM)
+
+
+def tariff_weights(user_ids):
+    """
+    ``({user_id: weight}, seconds until the first of those tariffs ends)``; the weight is the
+    price of the owner's most expensive active, unexpired tariff.
+    """
+    now = timezone.now()
+    weights, remaining = {}, None
+    tariffs = Tariff.objects.filter(user_id__in=user_ids, status=Property.Status.ACTIVE).order_by()
+    for user_id, price, created_at, duration_days in tariffs.values_list('user_id', 'price', 'created_at',
+                                                                         'duration_days'):
+        left = (created_at + timedelta(days=duration_days) - now).total_seconds()
+        if left <= 0 or price <= 0:
+            continue
+        weights[user_id] = max(weights.get(user_id, 0.0), float(price))
+        remaining = left if remaining is None else min(remaining, left)
+    return weights, remaining
+
+
+class VipFeed:
+    """
+    Ids and weights of the active VIP and premium listings, built in two queries and kept in
+    memory. Owners without an active tariff weigh as much as the cheapest one in the feed.
+    Signals mark the feed stale on label, status and tariff changes; it is also rebuilt after
+    ``ttl`` seconds, or sooner when a tariff in it runs out.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.version = 0
+        self.entry = None
+        self.member_ids = frozenset()
+
+    def invalidate(self):
+        self.version += 1
+
+    def touches(self, instance):
+        return instance.pk in self.member_ids or (
+            instance.label in FEED_LABELS and instance.status == Property.Status.ACTIVE)
+
+    def build(self):
+        rows = list(Property.objects.filter(status=Property.Status.ACTIVE, label__in=FEED_LABELS)
+                    .order_by('id').values_list('id', 'user_id'))
+        weights, remaining = tariff_weights({user_id for _, user_id in rows if user_id is not None})
+        base = min(weights.values(), default=1.0)
+        ids = [pk for pk, _ in rows]
+        ttl = self.ttl if remaining is None else min(self.ttl, remaining)
+        return time.monotonic() + ttl, ids, [weights.get(user_id, base) for _, user_id in rows]
+
+    def get(self):
+        entry = self.entry
+        if entry is None or entry[0] != self.version or time.monotonic() >= entry[1]:
+            with self.lock:
+                entry = self.entry
+                if entry is None or entry[0] != self.version or time.monotonic() >= entry[1]:
+                    version = self.version
+                    entry = (version, *self.build())
+                    self.entry = entry
+                    self.member_ids = frozenset(entry[2])
+        return entry[2], entry[3]
+
+    def sample(self, limit):
+        """
+        Up to ``limit`` ids drawn without replacement, each with probability proportional to
+        its weight (Efraimidis-Spirakis: the largest ``u ** (1 / weight)`` keys win).
+        """
+        ids, weights = self.get()
+        keys = ((random.random() ** (1.0 / weight), pk) for pk, weight in zip(ids, weights))
+        return [pk for _, pk in heapq.nlargest(limit, keys)]
+
+
+vip_feed = VipFeed(getattr(settings, 'VIP_FEED_TTL', 60))
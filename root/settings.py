@@ -36,6 +36,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.middleware.QueryShapeMiddleware',
 ]
 
 ROOT_URLCONF = 'root.urls'
@@ -65,6 +66,23 @@ DATABASES = {
     }
 }
 
+# The response cache versions entries with per-model generation counters kept in the same
+# cache, so with several worker processes it must be a shared backend (Redis, Memcached or
+# 'django.core.cache.backends.db.DatabaseCache'); FileBasedCache works on a single host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -108,8 +126,8 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
-    # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    # 'PAGE_SIZE': 2
+    'DEFAULT_PAGINATION_CLASS': 'apps.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -117,6 +135,30 @@ REST_FRAMEWORK = {
 
 }
 
+# Property views and saves are buffered in memory and written this often (seconds)
+VIEW_COUNTER_FLUSH_INTERVAL = 2
+# Write them from a daemon thread instead of from the request that finds the buffer due
+VIEW_COUNTER_BACKGROUND_FLUSH = False
+
+# count=auto counts exactly up to this many rows, then falls back to an estimate
+PAGINATION_EXACT_COUNT_LIMIT = 1000
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+
+# Answer SearchProperty from an in-memory NumPy copy of the filterable columns (needs numpy)
+PROPERTY_COLUMN_INDEX = False
+PROPERTY_COLUMN_INDEX_REFRESH = 5
+# Rank property/<pk>/similar from an in-memory feature matrix (needs numpy, falls back to the ORM)
+PROPERTY_SIMILARITY_INDEX = False
+# Seconds the in-memory VIP home feed is kept before it is rebuilt (signals also mark it stale)
+VIP_FEED_TTL = 60
+# Seconds a home/ section may take before it is returned as null
+HOME_SECTION_TIMEOUT = 2
+# Seconds pre-rendered blog and static page bodies are kept (a save replaces them anyway)
+PRERENDER_TIMEOUT = 86400
+
+# Seconds between writes of recorded search shapes to QueryShape (see manage.py index_advisor)
+QUERY_SHAPE_FLUSH_INTERVAL = 30
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Your Project API',
     'DESCRIPTION': 'Your project description',